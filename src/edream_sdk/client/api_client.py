@@ -1,9 +1,11 @@
 import requests
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterator
 from enum import Enum
 from ..types.api_types import ApiResponse
+from ..utils.pagination_utils import iter_pages
 
 EDREAM_USER_AGENT = "EdreamSDK"
+DEFAULT_FEED_PAGE_SIZE = 48
 
 
 class ApiClient:
@@ -61,9 +63,13 @@ class ApiClient:
         except requests.exceptions.HTTPError as http_err:
             # Handle HTTP errors (e.g., 4xx, 5xx status codes)
             error_message = f"HTTP error occurred: {http_err}"
-            error_response = (
-                response.json() if response.content else "No response content"
-            )
+            try:
+                error_response = (
+                    response.json() if response.content else "No response content"
+                )
+            except ValueError:
+                # gateways and CDNs answer errors with html or plain text
+                error_response = response.text
             print(error_message)
             print(f"Error details: {error_response}")
             raise
@@ -161,3 +167,74 @@ class FeedClient:
             
         response = self.api_client.get("/feed/grouped", params=params)
         return response["data"]
+
+    def iter_ranked_feed(self, page_size: int = 10, prefetch: bool = True) -> Iterator[dict]:
+        """
+        Iterate over the ranked feed, fetching pages on demand while the next one is
+        fetched in the background
+
+        Args:
+            page_size (int): Number of items per page (default: 10)
+            prefetch (bool): Fetch the next page while the current one is consumed
+
+        Returns:
+            Iterator[dict]: Ranked feed items
+        """
+        def get_page(take: int, skip: int):
+            page = self.get_ranked_feed(take=take, skip=skip)
+            return page["feed"], page.get("count")
+
+        return iter_pages(get_page, page_size, prefetch=prefetch)
+
+    def iter_feed(self, page_size: int = DEFAULT_FEED_PAGE_SIZE, search: str = None,
+                  user_uuid: str = None, feed_type: str = None, only_hidden: bool = None,
+                  prefetch: bool = True) -> Iterator[dict]:
+        """
+        Iterate over regular feed content, fetching pages on demand while the next one
+        is fetched in the background
+
+        Args:
+            page_size (int): Number of items per page (default: 48)
+            search (str, optional): Search query
+            user_uuid (str, optional): Filter by user UUID
+            feed_type (str, optional): Type filter ("dream", "playlist", "all")
+            only_hidden (bool, optional): Show only hidden items
+            prefetch (bool): Fetch the next page while the current one is consumed
+
+        Returns:
+            Iterator[dict]: Feed items
+        """
+        def get_page(take: int, skip: int):
+            page = self.get_feed(take=take, skip=skip, search=search, user_uuid=user_uuid,
+                                 feed_type=feed_type, only_hidden=only_hidden)
+            return page["feed"], page.get("count")
+
+        return iter_pages(get_page, page_size, prefetch=prefetch)
+
+    def iter_grouped_feed(self, page_size: int = DEFAULT_FEED_PAGE_SIZE, search: str = None,
+                          user_uuid: str = None, feed_type: str = None,
+                          only_hidden: bool = None, prefetch: bool = True) -> Iterator[dict]:
+        """
+        Iterate over grouped feed pages, fetching them on demand while the next one is
+        fetched in the background. Dreams are grouped into virtual playlists within a
+        page, so whole pages are yielded
+
+        Args:
+            page_size (int): Number of feed items per page, before grouping (default: 48)
+            search (str, optional): Search query
+            user_uuid (str, optional): Filter by user UUID
+            feed_type (str, optional): Type filter ("dream", "playlist", "all")
+            only_hidden (bool, optional): Show only hidden items
+            prefetch (bool): Fetch the next page while the current one is consumed
+
+        Returns:
+            Iterator[dict]: Grouped feed pages with feedItems, virtualPlaylists, and count
+        """
+        def get_page(take: int, skip: int):
+            page = self.get_grouped_feed(take=take, skip=skip, search=search, user_uuid=user_uuid,
+                                         feed_type=feed_type, only_hidden=only_hidden)
+            if not page.get("feedItems") and not page.get("virtualPlaylists"):
+                return [], page.get("count")
+            return [page], page.get("count")
+
+        return iter_pages(get_page, page_size, prefetch=prefetch, step=page_size)
@@ -5,6 +5,7 @@ from .keyframe_client import KeyframeClient
 from .playlist_client import PlaylistClient
 from .user_client import UserClient
 from .file_client import FileClient
+from .storage_transport import StorageTransport
 from .api_client import FeedClient
 
 
@@ -14,7 +15,9 @@ class EDreamClient(
     def __init__(self, backend_url: str, api_key: str):
         # Initialize clients with composition (so methods can be visible between clients)
         self.api_client = ApiClient(backend_url, api_key)
-        self.file_client = FileClient(self.api_client)
+        # Storage connections are pooled and shared by every file operation
+        self.storage = StorageTransport()
+        self.file_client = FileClient(self.api_client, self.storage)
         self.user_client = UserClient(self.api_client)
         self.dream_client = DreamClient(self.api_client)
         self.keyframe_client = KeyframeClient(self.api_client, self.file_client)
@@ -23,7 +26,7 @@ class EDreamClient(
 
         # Manually set up inheritance (so methods can be use on the main client)
         ApiClient.__init__(self, backend_url, api_key)
-        FileClient.__init__(self, self.api_client)
+        FileClient.__init__(self, self.api_client, self.storage)
         UserClient.__init__(self, self.api_client)
         DreamClient.__init__(self, self.api_client)
         KeyframeClient.__init__(self, self.api_client, self.file_client)
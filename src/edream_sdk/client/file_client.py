@@ -3,8 +3,17 @@ import requests
 import math
 import time
 import io
+import base64
+import hashlib
+import threading
+import queue
+import random
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from ..client.api_client import ApiClient
-from typing import Optional, List, Dict, Any, Union
+from ..client.dream_client import DreamClient
+from ..client.storage_transport import StorageTransport
+from typing import Optional, List, Dict, Any, Union, Callable, Iterable, Iterator, BinaryIO
 from dataclasses import asdict, is_dataclass
 from pathlib import Path
 from ..types.file_upload_types import (
@@ -17,53 +26,407 @@ from ..types.file_upload_types import (
     RefreshMultipartUploadUrlFormValues,
     UploadFileOptions,
     CompleteFileResponseWrapper,
+    UploadJournalState,
+    UploadResult,
+    UploadManyResult,
 )
+from ..types.file_download_types import DownloadJournalState
 from ..types.dream_types import Dream
 from ..types.types import T
+from ..utils.upload_utils import UploadJournal, PresignedUrls, iter_stream_parts
+from ..utils.dedup_utils import DedupIndex
+from ..utils.concurrency_utils import ByteBudget, AimdController
+from ..utils.file_utils import list_media_files
+from ..utils.cache_utils import MediaCache
+from ..utils.download_utils import (
+    ChunkStream,
+    DownloadJournal,
+    DownloadVerificationError,
+    OrderedFileHasher,
+    get_range_validator,
+    parse_content_range,
+    preallocate_file,
+    pwrite_all,
+)
 
-PART_SIZE = 1024 * 1024 * 200
+MIB = 1024 * 1024
+# deprecated, the fixed part size of earlier versions, parts are now sized by calculate_part_size
+PART_SIZE = 200 * MIB
+MIN_PART_SIZE = 8 * MIB
+MAX_PART_SIZE = 64 * MIB
+PARTS_PER_WORKER = 4
+# S3 multipart upload limits
+S3_MIN_PART_SIZE = 5 * MIB
+S3_MAX_PART_SIZE = 5 * 1024 * MIB
+S3_MAX_PARTS = 10000
 MAX_RETRIES = 3
-DOWNLOAD_CHUNCK_SIZE = 20 * 1024 * 1024
+HASH_BUFFER_SIZE = MIB
+DEFAULT_UPLOAD_CONCURRENCY = 1
+DEFAULT_MAX_UPLOAD_CONCURRENCY = 16
+DEFAULT_UPLOAD_JOBS = 4
+DEFAULT_UPLOAD_MEMORY_BUDGET = 1024 * 1024 * 1024
+DOWNLOAD_BUFFER_SIZE = MIB
+DOWNLOAD_MIN_SEGMENT_SIZE = 8 * MIB
+DOWNLOAD_MAX_SEGMENT_SIZE = 64 * MIB
+DEFAULT_DOWNLOAD_CONCURRENCY = 1
+DEFAULT_DOWNLOAD_JOBS = 4
+DOWNLOAD_MAX_RETRIES = 5
+# first retry delay in seconds, doubled on every attempt up to DOWNLOAD_MAX_RETRY_DELAY
+DOWNLOAD_RETRY_BACKOFF = 0.5
+DOWNLOAD_MAX_RETRY_DELAY = 30.0
+
+
+class UploadProgress:
+    """
+    Thread-safe byte counter shared by every part of an upload or download, so
+    progress stays correct when several parts are in flight at once
+    """
+
+    def __init__(self, callback, interval, total_size):
+        self.callback = callback
+        self.interval = interval
+        self.total_size = total_size
+        self.uploaded = 0
+        self.last_report = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.uploaded += count
+            current_time = time.time()
+            if current_time - self.last_report < self.interval:
+                return
+            self.last_report = current_time
+            uploaded = self.uploaded
+        self._notify(uploaded)
+
+    def report(self, uploaded: int) -> None:
+        with self._lock:
+            self.last_report = time.time()
+        self._notify(uploaded)
+
+    def _notify(self, uploaded: int) -> None:
+        if not self.callback or (self.total_size is not None and self.total_size <= 0):
+            return
+        # streams of unknown size report no total nor percentage
+        percentage = (uploaded / self.total_size) * 100 if self.total_size else None
+        try:
+            self.callback(uploaded, self.total_size, percentage)
+        except Exception as e:
+            print(f"Warning: Progress callback error: {e}")
 
 
 class ProgressTracker(io.BytesIO):
+    """
+    Deprecated, parts are streamed from disk by FileSlice and their progress counted
+    by UploadProgress. In-memory part body reporting progress as it is read
+    """
+
     def __init__(self, data, callback, interval, base_uploaded, total_size):
+        warnings.warn(
+            "ProgressTracker is deprecated, use FileSlice with UploadProgress",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         super().__init__(data)
         self.callback = callback
         self.interval = interval
         self.base_uploaded = base_uploaded
         self.total_size = total_size
-        self.last_report = time.time()
-        
+        self.progress = UploadProgress(callback, interval, total_size)
+        self.progress.uploaded = base_uploaded
+
     def read(self, size=-1):
         chunk = super().read(size)
-        if self.callback and self.total_size > 0:
-            current_time = time.time()
-            if current_time - self.last_report >= self.interval:
-                uploaded = self.base_uploaded + self.tell()
-                percentage = (uploaded / self.total_size) * 100
-                try:
-                    self.callback(uploaded, self.total_size, percentage)
-                except Exception as e:
-                    print(f"Warning: Progress callback error: {e}")
-                self.last_report = current_time
+        self.progress.add(len(chunk))
+        return chunk
+
+
+class FileSlice(io.RawIOBase):
+    """
+    Read-only stream over a byte range of a file, used as a part request body.
+    Bytes are read positionally (pread) in small blocks as the request consumes
+    them, so a part is not held in memory (unless preloaded for read-ahead) and
+    slices of the same file can be streamed concurrently. Read bytes are passed to
+    `hasher`, if set, once each, so a whole file md5 is computed as parts are sent
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        offset: int,
+        length: int,
+        progress: Optional[UploadProgress] = None,
+    ):
+        super().__init__()
+        self.file_path = file_path
+        self.offset = offset
+        self.length = length
+        self.progress = progress
+        self._position = 0
+        self._fd: Optional[int] = None
+        self._buffer: Optional[bytearray] = None
+        self.content_md5: Optional[str] = None
+        self.hasher: Optional[OrderedFileHasher] = None
+        # bytes of the slice already passed to the hasher, a retry reads them again
+        self._hashed = 0
+
+    @classmethod
+    def from_buffer(
+        cls,
+        buffer: bytearray,
+        progress: Optional[UploadProgress] = None,
+        content_md5: bool = False,
+    ) -> "FileSlice":
+        """
+        Wraps bytes already in memory, such as a part read from a stream
+        Args:
+            buffer (bytearray): part bytes
+            progress (Optional[UploadProgress]): shared upload progress
+            content_md5 (bool): compute the part md5 to send as Content-MD5 header
+        Returns:
+            FileSlice: preloaded slice
+        """
+        file_part = cls("", 0, len(buffer), progress)
+        file_part._buffer = buffer
+        if content_md5:
+            file_part.content_md5 = base64.b64encode(hashlib.md5(buffer).digest()).decode("ascii")
+        return file_part
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _get_fd(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        return self._fd
+
+    def preload(self, content_md5: bool = False) -> None:
+        """
+        Reads the whole range into memory, so sending it later doesn't wait on disk
+        Args:
+            content_md5 (bool): compute the part md5 to send as Content-MD5 header
+        """
+        buffer = bytearray(self.length)
+        view = memoryview(buffer)
+        count = 0
+        while count < self.length:
+            read = self._pread_into(view[count:], self.offset + count)
+            if not read:
+                raise EOFError(f"File {self.file_path} is shorter than expected")
+            count += read
+        self._buffer = buffer
+        self._close_fd()
+        if content_md5:
+            self.content_md5 = base64.b64encode(hashlib.md5(buffer).digest()).decode("ascii")
+
+    def compute_content_md5(self) -> str:
+        """
+        Computes the part md5 sent as Content-MD5 header, reading the range through a
+        fixed size buffer unless it is preloaded
+        Returns:
+            str: base64 encoded md5 digest
+        """
+        if self.content_md5 is None:
+            part_hash = hashlib.md5()
+            if self._buffer is not None:
+                part_hash.update(self._buffer)
+            else:
+                self.update_hash(part_hash)
+            self.content_md5 = base64.b64encode(part_hash.digest()).decode("ascii")
+        return self.content_md5
+
+    def update_hash(self, file_hash: Any) -> None:
+        """
+        Streams the range through a hashlib object, without holding it in memory
+        Args:
+            file_hash (Any): hashlib object
+        """
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        count = 0
+        while count < self.length:
+            size = min(HASH_BUFFER_SIZE, self.length - count)
+            read = self._pread_into(view[:size], self.offset + count)
+            if not read:
+                raise EOFError(f"File {self.file_path} is shorter than expected")
+            file_hash.update(view[:read])
+            count += read
+
+    def _pread_into(self, view: memoryview, position: int) -> int:
+        if hasattr(os, "preadv"):
+            return os.preadv(self._get_fd(), [view], position)
+        chunk = self._pread(len(view), position)
+        view[: len(chunk)] = chunk
+        return len(chunk)
+
+    def _pread(self, size: int, position: int) -> bytes:
+        fd = self._get_fd()
+        if hasattr(os, "pread"):
+            return os.pread(fd, size, position)
+        # no positional reads on this platform, the descriptor is private to the slice
+        os.lseek(fd, position, os.SEEK_SET)
+        return os.read(fd, size)
+
+    def _hash(self, start: int, data: Any) -> None:
+        # bytes are passed on the first read only, in order
+        end = start + len(data)
+        if self.hasher is None or start > self._hashed or end <= self._hashed:
+            return
+        self.hasher.update(self.offset + self._hashed, data[self._hashed - start :])
+        self._hashed = end
+
+    def _advance(self, position: int) -> None:
+        delta = position - self._position
+        self._position = position
+        if self.progress and delta:
+            self.progress.add(delta)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.length
+        # rewinding also rewinds reported progress, so a retried part is not counted twice
+        self._advance(min(max(offset, 0), self.length))
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.length - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b""
+        if self._buffer is not None:
+            chunk = bytes(self._buffer[self._position : self._position + size])
+        else:
+            chunk = self._pread(size, self.offset + self._position)
+        self._hash(self._position, chunk)
+        self._advance(self._position + len(chunk))
         return chunk
 
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        size = min(len(view), self.length - self._position)
+        if size <= 0:
+            return 0
+        position = self.offset + self._position
+        if self._buffer is not None:
+            count = size
+            view[:count] = self._buffer[self._position : self._position + count]
+        else:
+            count = self._pread_into(view[:size], position)
+        self._hash(self._position, view[:count])
+        self._advance(self._position + count)
+        return count
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def close(self) -> None:
+        self._close_fd()
+        self._buffer = None
+        super().close()
+
+
+def calculate_part_size(
+    file_size: int, concurrency: int = DEFAULT_UPLOAD_CONCURRENCY
+) -> int:
+    """
+    Calculates upload part size, small enough to give every worker a few parts and
+    keep retries cheap, large enough to stay within S3 multipart limits
+    Args:
+        file_size (int): file size
+        concurrency (int): number of parts uploaded in parallel
+    Returns:
+        int: part size in bytes, a multiple of 1 MiB
+    """
+    target_parts = max(int(concurrency), 1) * PARTS_PER_WORKER
+    part_size = min(max(math.ceil(file_size / target_parts), MIN_PART_SIZE), MAX_PART_SIZE)
+    # very large files need larger parts to fit in S3_MAX_PARTS
+    part_size = max(part_size, math.ceil(file_size / S3_MAX_PARTS))
+    part_size = math.ceil(part_size / MIB) * MIB
+    return min(part_size, S3_MAX_PART_SIZE)
+
+
+def validate_part_size(file_size: int, part_size: int) -> None:
+    """
+    Validates a part size against S3 multipart limits
+    Args:
+        file_size (int): file size
+        part_size (int): part size
+    """
+    if part_size <= 0 or part_size > S3_MAX_PART_SIZE:
+        raise ValueError(f"Part size must be between 1 and {S3_MAX_PART_SIZE} bytes, got {part_size}")
+    if part_size < S3_MIN_PART_SIZE and file_size > part_size:
+        raise ValueError(f"Part size must be at least {S3_MIN_PART_SIZE} bytes for multipart uploads, got {part_size}")
+    if calculate_total_parts(file_size, part_size) > S3_MAX_PARTS:
+        raise ValueError(f"Part size {part_size} splits the file in more than {S3_MAX_PARTS} parts")
 
-def calculate_total_parts(file_size: int) -> int:
+
+def calculate_segment_size(file_size: int, concurrency: int) -> int:
+    """
+    Chooses a download byte range size giving every worker several ranges, so a
+    slow range near the end doesn't leave the other workers idle
+    Args:
+        file_size (int): file size
+        concurrency (int): number of ranges downloaded in parallel
+    Returns:
+        int: range size
+    """
+    target_segments = max(int(concurrency), 1) * PARTS_PER_WORKER
+    segment_size = math.ceil(file_size / target_segments)
+    return min(max(segment_size, DOWNLOAD_MIN_SEGMENT_SIZE), DOWNLOAD_MAX_SEGMENT_SIZE)
+
+
+def download_retry_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter before retrying a download request
+    Args:
+        attempt (int): number of failed attempts so far
+    Returns:
+        float: delay in seconds
+    """
+    delay = min(DOWNLOAD_RETRY_BACKOFF * 2 ** max(attempt - 1, 0), DOWNLOAD_MAX_RETRY_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def calculate_total_parts(file_size: int, part_size: Optional[int] = None) -> int:
     """
     Calculates total upload parts
     Args:
         file_size (int): file size
+        part_size (Optional[int]): part size (defaults to calculate_part_size)
     Returns:
         int: total number of parts
     """
-    return max(math.ceil(file_size / PART_SIZE), 1)
+    if part_size is None:
+        part_size = calculate_part_size(file_size)
+    return max(math.ceil(file_size / part_size), 1)
 
 
 class FileClient:
-    def __init__(self, api_client: ApiClient):
+    def __init__(
+        self,
+        api_client: ApiClient,
+        storage: Optional[StorageTransport] = None,
+        media_cache: Optional[MediaCache] = None,
+    ):
         self.api_client = api_client
+        self.dream_client = DreamClient(api_client)
+        self.storage = storage if storage is not None else StorageTransport()
+        self.media_cache = media_cache
 
     def _get_create_upload_endpoint(
         self, type: FileType, uuid: Optional[str] = None
@@ -194,13 +557,14 @@ class FileClient:
         part_number: int,
         file_extension: str,
         options: UploadFileOptions,
+        parts: int = 1,
     ) -> RefreshMultipartUploadUrlFormValues:
         payload: RefreshMultipartUploadUrlFormValues = {
             "type": type,
             "uploadId": upload_id,
             "part": part_number,
             "extension": file_extension,
-            "parts": 1,
+            "parts": parts,
         }
 
         # Add optional fields based on file type
@@ -364,24 +728,18 @@ class FileClient:
     def _upload_file_request(
         self,
         presigned_url: str,
-        file_part: bytes,
+        file_part: FileSlice,
         file_type: Optional[str] = None,
-        progress_callback: Optional[Any] = None,
-        progress_interval: float = 1.0,
-        base_bytes_uploaded: int = 0,
-        total_file_size: int = 0,
     ) -> Optional[str]:
         headers = {"Content-Type": file_type or ""}
-        
+        if file_part.content_md5:
+            headers["Content-MD5"] = file_part.content_md5
+
         try:
-            if progress_callback and total_file_size > 0:
-                data = ProgressTracker(file_part, progress_callback, progress_interval, base_bytes_uploaded, total_file_size)
-            else:
-                data = file_part
-                
-            response = requests.put(
+            file_part.seek(0)
+            response = self.storage.put(
                 presigned_url,
-                data=data,
+                data=file_part,
                 headers=headers,
             )
             response.raise_for_status()
@@ -389,6 +747,8 @@ class FileClient:
             cleaned_etag = etag.strip('"')
             return cleaned_etag
         except requests.exceptions.RequestException as e:
+            # discount bytes of the failed attempt, the part is sent again
+            file_part.seek(0)
             return None
 
     def download_file(
@@ -396,60 +756,52 @@ class FileClient:
         url: str, 
         file_path: Optional[str] = None,
         progress_callback: Optional[Any] = None,
-        progress_interval: float = 1.0
+        progress_interval: float = 1.0,
+        concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+        segment_size: Optional[int] = None,
+        md5: Optional[str] = None,
+        dream: Optional[Dream] = None,
     ) -> bool:
         """
-        Downloads a file from a url to a path
+        Downloads a file from a url to a path. Bytes go to `<file_path>.part`, renamed to
+        file_path once complete, and an interrupted download continues where it stopped
+        on the next call, if the remote file didn't change
         Args:
             url (str): URL to download from
             file_path (Optional[str]): Path to save file to (defaults to basename of URL)
             progress_callback (Optional[Callable]): Optional callback function for progress updates
             progress_interval (float): Interval in seconds between progress updates
+            concurrency (int): Number of byte ranges downloaded in parallel, 1 for a single stream
+            segment_size (Optional[int]): Byte range size (default chosen from file size and concurrency)
+            md5 (Optional[str]): Expected md5, checked on bytes as they are written
+            dream (Optional[Dream]): Dream whose video is downloaded, its md5 is checked if md5 isn't given
         Returns:
             bool: True if download successful, False otherwise
+        Raises:
+            DownloadVerificationError: if the downloaded file doesn't match the expected md5
         """
+        if md5 is None and dream is not None:
+            md5 = dream.get("md5")
+
         if file_path is None:
             # Default to basename of URL if no path is provided
             file_path = os.path.basename(url)
 
         # Ensure the directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
 
         try:
-            response = requests.get(url, stream=True)
-            
-            # Raise an error for bad status codes
-            response.raise_for_status()
-
-            # Try to get file size from response headers
-            file_size = int(response.headers.get("content-length", 0))
-
-            # In progress bytes downloaded
-            bytes_downloaded = 0
-            last_progress_time = time.time()
-
-            # Write the content to a file
-            with open(file_path, "wb") as file:
-                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNCK_SIZE):
-                    if chunk:
-                        file.write(chunk)
-                        bytes_downloaded += len(chunk)
-
-                    if file_size > 0:
-                        current_time = time.time()
-                        if progress_callback and (current_time - last_progress_time >= progress_interval):
-                            progress_percentage = (bytes_downloaded / file_size) * 100
-                            try:
-                                progress_callback(bytes_downloaded, file_size, progress_percentage)
-                            except Exception as e:
-                                print(f"Warning: Progress callback error: {e}")
-                            last_progress_time = current_time
-
-            if progress_callback and file_size > 0:
-                try:
-                    progress_callback(file_size, file_size, 100.0)
-                except Exception as e:
-                    print(f"Warning: Progress callback error: {e}")
+            progress = UploadProgress(progress_callback, progress_interval, 0)
+            self._download(
+                url,
+                file_path,
+                progress=progress,
+                concurrency=concurrency,
+                segment_size=segment_size,
+                md5=md5,
+            )
             
             # Verify the file was created and has content
             if os.path.exists(file_path):
@@ -460,181 +812,1006 @@ class FileClient:
 
         except requests.exceptions.RequestException:
             return False
+        except DownloadVerificationError:
+            raise
         except Exception:
             return False
 
-    def _upload_file_part(
+    def download_cached(
         self,
-        uuid: str,
-        type: FileType,
-        upload_id: str,
-        presigned_url: str,
-        part_number: int,
-        file_part: bytes,
-        file_type: Optional[str] = None,
-        options: Optional[UploadFileOptions] = None,
+        url: str,
+        md5: Optional[str] = None,
         progress_callback: Optional[Any] = None,
         progress_interval: float = 1.0,
-        base_bytes_uploaded: int = 0,
-        total_file_size: int = 0,
-    ) -> Optional[str]:
+        concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+    ) -> str:
         """
-        Refreshes multipart upload part
+        Returns a local copy of a media from the media cache, downloading it on a miss.
+        Concurrent misses of the same media, from threads or processes, download it once
         Args:
-            uuid (str): resource uuid
-            upload_id (str): generated multipart upload id
-            presigned_url (str): presigned url to target request
-            part_number (int): part number
-            file_part (bytes): file part bytes
-            file_type (str): file type
-            progress_callback: callback for progress updates
-            progress_interval: interval in seconds between progress updates
-            base_bytes_uploaded: bytes already uploaded before this part
-            total_file_size: total size of the file being uploaded
+            url (str): URL to download from
+            md5 (Optional[str]): media md5 (such as Dream.md5), so the same content
+                behind different urls is cached once
+            progress_callback (Optional[Callable]): Optional callback function for progress updates
+            progress_interval (float): Interval in seconds between progress updates
+            concurrency (int): Number of byte ranges downloaded in parallel
         Returns:
-            str: etag str
+            str: cached file path
+        Raises:
+            DownloadVerificationError: if the downloaded file doesn't match md5
         """
-        attempt = 0
-        url = presigned_url
-        while attempt < MAX_RETRIES:
-            result = self._upload_file_request(
-                presigned_url=url, 
-                file_part=file_part, 
-                file_type=file_type,
+        if self.media_cache is None:
+            self.media_cache = MediaCache()
+        cache = self.media_cache
+
+        path = cache.get(url, md5)
+        if path is not None and (not md5 or cache.is_verified(url, md5)):
+            return path
+        with cache.lock(url, md5):
+            # downloaded by another thread or process meanwhile
+            path = cache.get(url, md5)
+            if path is not None and md5 and not cache.is_verified(url, md5):
+                # added without a check, hashed once and trusted from then on
+                file_hash = hashlib.md5()
+                with FileSlice(path, 0, os.path.getsize(path)) as file_slice:
+                    file_slice.update_hash(file_hash)
+                if file_hash.hexdigest() == md5.lower():
+                    cache.mark_verified(url, md5)
+                else:
+                    cache.remove(url, md5)
+                    path = None
+            if path is not None:
+                return path
+            temp_path = cache.get_temp_path(url, md5)
+            if not self.download_file(
+                url,
+                temp_path,
                 progress_callback=progress_callback,
                 progress_interval=progress_interval,
-                base_bytes_uploaded=base_bytes_uploaded,
-                total_file_size=total_file_size,
-            )
-            if result is not None:
-                return result
-            else:
-                # new attemp
-                attempt += 1
-                if attempt < MAX_RETRIES:
-                    print(f"Retrying part {attempt + 1}.")
-                    refresh_upload_endpoint = self._get_refresh_url_endpoint(type, uuid)
-                    refresh_payload = self._build_refresh_payload(
-                        type=type,
-                        upload_id=upload_id,
-                        part_number=part_number,
-                        file_extension=file_type,
-                        options=options,
-                    )
-                    refresh_result = self._refresh_multipart_upload(
-                        endpoint=refresh_upload_endpoint, request_data=refresh_payload
-                    )
-                    url = refresh_result["urls"][0]
-                else:
-                    raise Exception(f"Upload failed. Max retries reached on part {part_number}")
+                concurrency=concurrency,
+                md5=md5,
+            ):
+                raise Exception(f"Download of {url.split('?')[0]} failed")
+            return cache.put(url, temp_path, md5, verified=bool(md5))
 
-    def upload_file(
+    def iter_download(
         self,
-        file_path: str,
-        type: FileType,
-        options: Optional[UploadFileOptions] = None,
-    ) -> Dream | bool | Any:
+        url: str,
+        chunk_size: int = DOWNLOAD_BUFFER_SIZE,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> Iterator[bytes]:
         """
-        This function should be made private in future versions.
-        Complete function to upload file to s3 creating a resource on process.
+        Streams a file, or a byte range of it, without writing it to disk. Chunks are
+        read from the connection only as they are consumed, so memory stays at about
+        one chunk however slow the consumer is. A dropped connection continues from
+        the last yielded byte, with If-Range so a file changed meanwhile is never mixed
         Args:
-            file_path (str): file path
-            type (FileType): type of file to upload
+            url (str): URL to download from
+            chunk_size (int): maximum chunk size in bytes
+            start (int): position of the first byte
+            end (Optional[int]): position after the last byte, the end of the file if None
         Returns:
-            Dream | bool | Any: created resource after completing upload
+            Iterator[bytes]: file bytes from start to end
+        Raises:
+            ValueError: if the offsets are invalid
         """
+        if start < 0 or (end is not None and end < start):
+            raise ValueError(f"Invalid byte range {start}-{end}")
+        position = start
+        validator = None
+        attempt = 0
+        while end is None or position < end:
+            headers = {}
+            if position or end is not None:
+                last = "" if end is None else str(end - 1)
+                headers["Range"] = f"bytes={position}-{last}"
+                if validator:
+                    headers["If-Range"] = validator
+            try:
+                response = self._get_with_retries(url, headers=headers)
+                with response:
+                    content_range = parse_content_range(response.headers.get("content-range"))
+                    if response.status_code == 416 and content_range:
+                        # start is at or past the end of the file
+                        return
+                    response.raise_for_status()
+                    response_validator = get_range_validator(
+                        response.headers.get("etag"), response.headers.get("last-modified")
+                    )
+                    if response.status_code == 206 and content_range and content_range[0] == position:
+                        skip = 0
+                        stream_end = content_range[1] + 1
+                    elif validator is not None and response_validator != validator:
+                        raise Exception(f"File at {url.split('?')[0]} changed during download")
+                    else:
+                        # ranges aren't served, the whole file is sent
+                        skip = position
+                        stream_end = int(response.headers.get("content-length", 0)) or None
+                    validator = response_validator
 
-        if type not in [
-            FileType.DREAM,
-            FileType.THUMBNAIL,
-            FileType.FILMSTRIP,
-            FileType.KEYFRAME,
-        ]:
-            raise Exception(f"Type not allowed.")
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if skip:
+                            dropped = min(skip, len(chunk))
+                            chunk = chunk[dropped:]
+                            skip -= dropped
+                        if end is not None:
+                            chunk = chunk[: end - position]
+                        if chunk:
+                            position += len(chunk)
+                            yield chunk
+                        if end is not None and position >= end:
+                            return
+                if stream_end is not None and position < stream_end:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Download ended at byte {position} of {stream_end}"
+                    )
+                return
+            except requests.exceptions.HTTPError:
+                # client errors, server errors were already retried
+                raise
+            except requests.exceptions.RequestException:
+                attempt += 1
+                if attempt >= DOWNLOAD_MAX_RETRIES:
+                    raise
+                print(f"Retrying download from byte {position}, attempt {attempt + 1}.")
+                time.sleep(download_retry_delay(attempt))
 
-        path = Path(file_path)
-        file_extension = path.suffix.lstrip(".")
-        file_size = path.stat().st_size
-        total_parts = calculate_total_parts(file_size)
+    def open_download(
+        self,
+        url: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        buffer_size: int = DOWNLOAD_BUFFER_SIZE,
+    ) -> io.BufferedReader:
+        """
+        Opens a file, or a byte range of it, as a readable binary stream over the
+        network, such as the stdin of a transcoding process. Close it, or use it as a
+        context manager, to release the connection when stopping early
+        Args:
+            url (str): URL to download from
+            start (int): position of the first byte
+            end (Optional[int]): position after the last byte, the end of the file if None
+            buffer_size (int): read buffer size in bytes
+        Returns:
+            io.BufferedReader: readable binary stream
+        """
+        chunks = self.iter_download(url, chunk_size=buffer_size, start=start, end=end)
+        return io.BufferedReader(ChunkStream(chunks), buffer_size=buffer_size)
 
-        # Extract options
-        uuid = options.get("uuid") if options else None
+    def _download(
+        self,
+        url: str,
+        file_path: str,
+        progress: UploadProgress,
+        concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+        segment_size: Optional[int] = None,
+        md5: Optional[str] = None,
+    ) -> None:
+        """
+        Downloads a file to `<file_path>.part`, resuming it from its journal, and
+        renames it to file_path once complete
+        Args:
+            url (str): URL to download from
+            file_path (str): path to save file to
+            progress (UploadProgress): download progress, its total is set once known
+            concurrency (int): number of byte ranges downloaded in parallel
+            segment_size (Optional[int]): byte range size
+            md5 (Optional[str]): expected md5, checked before the file is renamed
+        """
+        part_path = f"{file_path}.part"
+        journal = DownloadJournal(f"{part_path}.json")
+        state = journal.load(url) if os.path.exists(part_path) else None
+        hasher = OrderedFileHasher(part_path) if md5 else None
+        try:
+            self._download_part(
+                url,
+                part_path,
+                progress=progress,
+                journal=journal,
+                state=state,
+                concurrency=concurrency,
+                segment_size=segment_size,
+                hasher=hasher,
+            )
+            if hasher is not None:
+                digest = hasher.hexdigest(os.path.getsize(part_path))
+                if digest != md5.lower():
+                    # corrupt or a different file, not resumed
+                    journal.discard()
+                    os.remove(part_path)
+                    raise DownloadVerificationError(
+                        f"MD5 mismatch for {url.split('?')[0]}: expected {md5}, got {digest}"
+                    )
+        finally:
+            if hasher is not None:
+                hasher.close()
 
-        # Create multipart upload
-        create_upload_endpoint = self._get_create_upload_endpoint(type, uuid)
-        create_payload = self._build_create_payload(
-            type=type,
-            parts=total_parts,
-            path=path,
-            options=options,
-        )
+        os.replace(part_path, file_path)
+        journal.discard()
+        progress.report(progress.total_size)
 
-        # create multipart upload
-        multipart_upload: MultipartUpload = self._create_multipart_upload(
-            endpoint=create_upload_endpoint, request_data=create_payload
-        )
+    def _download_part(
+        self,
+        url: str,
+        part_path: str,
+        progress: UploadProgress,
+        journal: DownloadJournal,
+        state: Optional[DownloadJournalState] = None,
+        concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+        segment_size: Optional[int] = None,
+        hasher: Optional[OrderedFileHasher] = None,
+    ) -> None:
+        """
+        Downloads a file to its `.part` path, in byte ranges if concurrency > 1 and the
+        server serves them, over a single stream otherwise
+        Args:
+            url (str): URL to download from
+            part_path (str): partial file path
+            progress (UploadProgress): download progress, its total is set once known
+            journal (DownloadJournal): download journal
+            state (Optional[DownloadJournalState]): journal state of a previous attempt
+            concurrency (int): number of byte ranges downloaded in parallel
+            segment_size (Optional[int]): byte range size
+            hasher (Optional[OrderedFileHasher]): hasher of written bytes
+        """
 
-        # if type == FileType.DREAM and it doesn't have uuid (created on multipart request for dreams), set uuid
-        if (
-            uuid is None
-            and type == FileType.DREAM
-            and multipart_upload is not None
-            and (dream := multipart_upload.get("dream")) is not None
-        ):
-            if not isinstance(dream, dict):
-                raise Exception(f"Multipart upload dream is not a dict. Type: {type(dream)}, Value: {dream}")
-            if "uuid" not in dream:
-                raise Exception(f"Multipart upload dream object missing 'uuid' key. Dream: {dream}, MultipartUpload: {multipart_upload}")
-            uuid = dream["uuid"]
+        probe = None
+        if concurrency > 1:
+            # a one byte range tells the file size and whether ranges are served
+            response = self._get_with_retries(url, headers={"Range": "bytes=0-0"})
+            content_range = parse_content_range(response.headers.get("content-range"))
+            if response.status_code == 206 and content_range and content_range[2]:
+                response.close()
+                file_size = content_range[2]
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+                validator = get_range_validator(etag, last_modified)
+                done: List[List[int]] = []
+                if (
+                    state is not None
+                    and state.get("segmentSize")
+                    and state.get("size") == file_size
+                    and validator is not None
+                    and get_range_validator(state.get("etag"), state.get("lastModified")) == validator
+                    and os.path.getsize(part_path) == file_size
+                ):
+                    segment_size = state["segmentSize"]
+                    done = state["ranges"]
+                else:
+                    segment_size = segment_size or calculate_segment_size(file_size, concurrency)
+                    preallocate_file(part_path, file_size)
+                    journal.start(
+                        {
+                            "url": url,
+                            "etag": etag,
+                            "lastModified": last_modified,
+                            "size": file_size,
+                            "segmentSize": segment_size,
+                        }
+                    )
+                progress.total_size = file_size
+                self._download_segments(
+                    url,
+                    part_path,
+                    file_size=file_size,
+                    segment_size=segment_size,
+                    concurrency=concurrency,
+                    progress=progress,
+                    validator=validator,
+                    journal=journal,
+                    done=done,
+                    hasher=hasher,
+                )
+                return
+            if response.status_code == 200:
+                # ranges aren't served, the probe body is the whole file
+                probe = response
+            else:
+                response.close()
+            if state is not None and state.get("segmentSize"):
+                # ranges aren't served anymore, a partial segmented download can't continue
+                state = None
 
-        upload_id = multipart_upload["uploadId"]
-        urls = multipart_upload["urls"]
-        completed_parts: List[CompletedPart] = []
+        self._download_stream(url, part_path, progress, journal, state, hasher, probe)
 
-        progress_callback = options.get("progress_callback") if options else None
-        progress_interval = options.get("progress_interval", 1.0) if options else 1.0
+    def _get_with_retries(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """
+        Sends a streamed GET request, retrying connection errors and server errors with backoff
+        Args:
+            url (str): URL to request
+            headers (Optional[Dict[str, str]]): request headers
+        Returns:
+            requests.Response: successful response, its body not read yet
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.storage.get(url, stream=True, headers=headers)
+                if response.status_code < 500 and response.status_code != 429:
+                    return response
+                response.close()
+                response.raise_for_status()
+            except requests.exceptions.RequestException:
+                attempt += 1
+                if attempt >= DOWNLOAD_MAX_RETRIES:
+                    raise
+                print(f"Retrying request to {url.split('?')[0]}, attempt {attempt + 1}.")
+                time.sleep(download_retry_delay(attempt))
 
-        # in progreess bytes uploaded
-        bytes_uploaded = 0
+    def _download_stream(
+        self,
+        url: str,
+        part_path: str,
+        progress: UploadProgress,
+        journal: DownloadJournal,
+        state: Optional[DownloadJournalState] = None,
+        hasher: Optional[OrderedFileHasher] = None,
+        response: Optional[requests.Response] = None,
+    ) -> None:
+        """
+        Downloads a file over a single connection, appending to a partial download
+        with a Range request validated by If-Range, and continuing the same way after
+        a failed attempt
+        Args:
+            url (str): URL to download from
+            part_path (str): partial file path
+            progress (UploadProgress): download progress
+            journal (DownloadJournal): download journal
+            state (Optional[DownloadJournalState]): journal state of a previous attempt
+            hasher (Optional[OrderedFileHasher]): hasher of written bytes
+            response (Optional[requests.Response]): open response already received for
+                the file, its body is streamed before any other request is sent
+        """
+        position = 0
+        validator = None
+        if state is not None and not state.get("segmentSize"):
+            position = os.path.getsize(part_path)
+            validator = get_range_validator(state.get("etag"), state.get("lastModified"))
+        progress.add(position)
+        if hasher is not None:
+            hasher.add_range(0, position)
 
-        if progress_callback:
+        attempt = 0
+        while True:
+            headers = {}
+            if position and validator:
+                headers = {"Range": f"bytes={position}-", "If-Range": validator}
             try:
-                progress_callback(0, file_size, 0.0)
-            except Exception as e:
-                print(f"Warning: Progress callback error: {e}")
+                if response is None:
+                    response = self._get_with_retries(url, headers=headers)
+                with response:
+                    content_range = parse_content_range(response.headers.get("content-range"))
+                    if response.status_code == 416 and position and content_range and content_range[2] == position:
+                        # every byte was already downloaded
+                        progress.total_size = position
+                        return
+                    response.raise_for_status()
+                    if response.status_code == 206 and position and content_range and content_range[0] == position:
+                        mode = "ab"
+                        file_size = content_range[2]
+                    else:
+                        # the whole file, because nothing was downloaded yet, it changed,
+                        # or ranges aren't served
+                        mode = "wb"
+                        progress.add(-position)
+                        position = 0
+                        if hasher is not None:
+                            hasher.reset()
+                        etag = response.headers.get("etag")
+                        last_modified = response.headers.get("last-modified")
+                        validator = get_range_validator(etag, last_modified)
+                        file_size = int(response.headers.get("content-length", 0)) or None
+                        journal.start(
+                            {
+                                "url": url,
+                                "etag": etag,
+                                "lastModified": last_modified,
+                                "size": file_size,
+                                "segmentSize": None,
+                            }
+                        )
+                    progress.total_size = file_size or 0
 
-        with open(file_path, "rb") as file:
-            for index, url in enumerate(urls):
-                part_number = index + 1
-                part_data = file.read(PART_SIZE)
+                    # Write the content to a file
+                    with open(part_path, mode) as file:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
+                            if chunk:
+                                file.write(chunk)
+                                if hasher is not None:
+                                    # read back by the hasher if it is behind, so written first
+                                    file.flush()
+                                    hasher.update(position, chunk)
+                                position += len(chunk)
+                                progress.add(len(chunk))
+                if file_size is not None and position < file_size:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Download ended at byte {position} of {file_size}"
+                    )
+                progress.total_size = position
+                return
+            except requests.exceptions.HTTPError:
+                # client errors, server errors were already retried
+                raise
+            except requests.exceptions.RequestException:
+                response = None
+                attempt += 1
+                if attempt >= DOWNLOAD_MAX_RETRIES:
+                    raise
+                print(f"Retrying download from byte {position}, attempt {attempt + 1}.")
+                time.sleep(download_retry_delay(attempt))
 
-                if not part_data:
-                    break
+    def _download_segments(
+        self,
+        url: str,
+        file_path: str,
+        file_size: int,
+        segment_size: int,
+        concurrency: int,
+        progress: UploadProgress,
+        validator: Optional[str] = None,
+        journal: Optional[DownloadJournal] = None,
+        done: Optional[List[List[int]]] = None,
+        hasher: Optional[OrderedFileHasher] = None,
+    ) -> None:
+        """
+        Downloads byte ranges of a file concurrently into a preallocated file, each
+        written in place as it arrives. A failed range is retried from its last byte
+        Args:
+            url (str): URL to download from
+            file_path (str): path to save file to
+            file_size (int): file size
+            segment_size (int): byte range size
+            concurrency (int): number of byte ranges downloaded in parallel
+            progress (UploadProgress): shared download progress
+            validator (Optional[str]): ETag or Last-Modified sent as If-Range, so a
+                file changed meanwhile is not mixed with the bytes downloaded so far
+            journal (Optional[DownloadJournal]): journal recording completed ranges
+            done (Optional[List[List[int]]]): ranges already downloaded, which are skipped
+            hasher (Optional[OrderedFileHasher]): hasher of written bytes
+        """
+        self.storage.reserve(concurrency)
+        done_starts = {first for first, last in done or []}
 
-                # obtain etag from _upload_file_part function call
-                etag = self._upload_file_part(
-                    type=type,
-                    uuid=uuid,
-                    upload_id=upload_id,
-                    part_number=part_number,
-                    presigned_url=url,
-                    file_part=part_data,
-                    file_type=file_extension,
-                    options=options,
-                    progress_callback=progress_callback,
-                    progress_interval=progress_interval,
-                    base_bytes_uploaded=bytes_uploaded,
-                    total_file_size=file_size,
-                )
-                completed_parts.append({"ETag": etag, "PartNumber": part_number})
-                bytes_uploaded += len(part_data)
+        def download_segment(start: int, end: int) -> None:
+            position = start
+            attempt = 0
+            headers = {"If-Range": validator} if validator else {}
+            fd = os.open(file_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+            try:
+                while position <= end:
+                    try:
+                        response = self._get_with_retries(
+                            url, headers={**headers, "Range": f"bytes={position}-{end}"}
+                        )
+                        with response:
+                            response.raise_for_status()
+                            if response.status_code == 200 and validator:
+                                # If-Range sent the whole file, it changed since the download started
+                                if journal:
+                                    journal.discard()
+                                raise Exception(f"File at {url.split('?')[0]} changed during download")
+                            content_range = parse_content_range(response.headers.get("content-range"))
+                            if response.status_code != 206 or not content_range or content_range[0] != position:
+                                raise requests.exceptions.RequestException(
+                                    f"Range {position}-{end} not served, status {response.status_code}"
+                                )
+                            for chunk in response.iter_content(chunk_size=DOWNLOAD_BUFFER_SIZE):
+                                chunk = chunk[: end + 1 - position]
+                                pwrite_all(fd, chunk, position)
+                                if hasher is not None:
+                                    hasher.update(position, chunk)
+                                position += len(chunk)
+                                progress.add(len(chunk))
+                        if position <= end:
+                            raise requests.exceptions.ChunkedEncodingError(
+                                f"Range {start}-{end} ended at {position}"
+                            )
+                    except requests.exceptions.HTTPError:
+                        # client errors, server errors were already retried
+                        raise
+                    except requests.exceptions.RequestException:
+                        attempt += 1
+                        if attempt >= DOWNLOAD_MAX_RETRIES:
+                            raise
+                        print(f"Retrying range {position}-{end}, attempt {attempt + 1}.")
+                        time.sleep(download_retry_delay(attempt))
+            finally:
+                os.close(fd)
+            if journal:
+                journal.record_range(start, end)
 
-        # Build the payload
-        complete_upload_endpoint = self._get_complete_upload_endpoint(type, uuid)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = []
+            for start in range(0, file_size, segment_size):
+                end = min(start + segment_size, file_size) - 1
+                if start in done_starts:
+                    progress.add(end + 1 - start)
+                    if hasher is not None:
+                        hasher.add_range(start, end + 1)
+                    continue
+                futures.append(executor.submit(download_segment, start, end))
+            # raises the first range failure, if any
+            for future in futures:
+                future.result()
 
-        complete_payload = self._build_complete_payload(
+    def _refresh_part_urls(
+        self,
+        uuid: str,
+        type: FileType,
+        upload_id: str,
+        part_number: int,
+        count: int = 1,
+        file_type: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+    ) -> List[str]:
+        """
+        Requests new presigned urls for consecutive multipart upload parts
+        Args:
+            uuid (str): resource uuid
+            upload_id (str): generated multipart upload id
+            part_number (int): first part number
+            count (int): number of parts
+            file_type (str): file type
+        Returns:
+            List[str]: presigned urls, from part_number on
+        """
+        refresh_upload_endpoint = self._get_refresh_url_endpoint(type, uuid)
+        refresh_payload = self._build_refresh_payload(
+            type=type,
             upload_id=upload_id,
-            parts=completed_parts,
+            part_number=part_number,
+            file_extension=file_type,
+            options=options,
+            parts=count,
+        )
+        refresh_result = self._refresh_multipart_upload(
+            endpoint=refresh_upload_endpoint, request_data=refresh_payload
+        )
+        return refresh_result["urls"]
+
+    def _refresh_part_url(
+        self,
+        uuid: str,
+        type: FileType,
+        upload_id: str,
+        part_number: int,
+        file_type: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+    ) -> str:
+        """
+        Requests a new presigned url for a multipart upload part
+        Args:
+            uuid (str): resource uuid
+            upload_id (str): generated multipart upload id
+            part_number (int): part number
+            file_type (str): file type
+        Returns:
+            str: presigned url
+        """
+        return self._refresh_part_urls(
+            uuid, type, upload_id, part_number, 1, file_type, options
+        )[0]
+
+    def _presigned_urls(
+        self,
+        uuid: str,
+        type: FileType,
+        upload_id: str,
+        urls: List[Optional[str]],
+        total_parts: Optional[int] = None,
+        done: Optional[List[int]] = None,
+        file_type: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+    ) -> PresignedUrls:
+        """
+        Wraps the part urls of an upload, so they are renewed in batches when needed
+        Args:
+            uuid (str): resource uuid
+            upload_id (str): generated multipart upload id
+            urls (List[Optional[str]]): known part urls, None if unknown
+            total_parts (Optional[int]): number of parts, None if unknown
+            done (Optional[List[int]]): parts already uploaded
+            file_type (str): file type
+        Returns:
+            PresignedUrls: part urls
+        """
+        return PresignedUrls(
+            urls,
+            refresh=lambda part_number, count: self._refresh_part_urls(
+                uuid, type, upload_id, part_number, count, file_type, options
+            ),
+            total_parts=total_parts,
+            done=done,
+        )
+
+    def _upload_file_part(
+        self,
+        uuid: str,
+        type: FileType,
+        upload_id: str,
+        urls: PresignedUrls,
+        part_number: int,
+        file_part: FileSlice,
+        file_type: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+        on_retry: Optional[Callable[[], None]] = None,
+    ) -> Optional[str]:
+        """
+        Refreshes multipart upload part
+        Args:
+            uuid (str): resource uuid
+            upload_id (str): generated multipart upload id
+            urls (PresignedUrls): part urls, renewed when missing, expiring or failed
+            part_number (int): part number
+            file_part (FileSlice): file part stream
+            file_type (str): file type
+            on_retry (Optional[Callable]): called after every failed attempt
+        Returns:
+            str: etag str
+        """
+        attempt = 0
+        while attempt < MAX_RETRIES:
+            url = urls.get(part_number)
+            result = self._upload_file_request(
+                presigned_url=url,
+                file_part=file_part,
+                file_type=file_type,
+            )
+            if result is not None:
+                urls.discard(part_number)
+                return result
+            else:
+                # new attemp, with a renewed url
+                attempt += 1
+                urls.invalidate(part_number, url)
+                if on_retry:
+                    on_retry()
+                if attempt < MAX_RETRIES:
+                    print(f"Retrying part {part_number}, attempt {attempt + 1}.")
+                else:
+                    raise Exception(f"Upload failed. Max retries reached on part {part_number}")
+
+    def _upload_parts(
+        self,
+        uuid: str,
+        type: FileType,
+        upload_id: str,
+        urls: List[Optional[str]],
+        file_path: str,
+        file_size: int,
+        part_size: int,
+        file_type: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+        progress: Optional[UploadProgress] = None,
+        concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        controller: Optional[AimdController] = None,
+        completed: Optional[Dict[int, str]] = None,
+        on_part_complete: Optional[Callable[[CompletedPart], None]] = None,
+        read_ahead: int = 0,
+        content_md5: bool = False,
+        file_hash: Optional[OrderedFileHasher] = None,
+        part_slots: Optional[threading.Semaphore] = None,
+        memory_budget: Optional[ByteBudget] = None,
+    ) -> List[CompletedPart]:
+        """
+        Uploads file parts to their presigned urls, up to `concurrency` parts at once
+        Args:
+            uuid (str): resource uuid
+            upload_id (str): generated multipart upload id
+            urls (List[Optional[str]]): presigned urls, one per part, None to refresh it before use
+            file_path (str): file path
+            file_size (int): file size
+            part_size (int): part size
+            file_type (str): file type
+            progress (Optional[UploadProgress]): shared upload progress
+            concurrency (int): max number of parts in flight, if no controller is given
+            controller (Optional[AimdController]): parts in flight limit, adapted to measured throughput
+            completed (Optional[Dict[int, str]]): etags of parts already uploaded, which are skipped
+            on_part_complete (Optional[Callable]): called with every newly completed part
+            read_ahead (int): number of parts read into memory by a background reader
+                while previous parts are sent, 0 to stream parts from disk
+            content_md5 (bool): send a Content-MD5 header with every part, each part is
+                hashed before it is sent, through a fixed size buffer unless read ahead
+            file_hash (Optional[OrderedFileHasher]): hasher of the whole file, fed with the
+                bytes of parts as they are sent
+            part_slots (Optional[threading.Semaphore]): parts in flight limit shared with other uploads
+            memory_budget (Optional[ByteBudget]): bytes of read-ahead buffers shared with other uploads
+        Returns:
+            List[CompletedPart]: completed parts sorted by part number
+        """
+        if controller is None:
+            concurrency = max(int(concurrency), 1)
+            controller = AimdController(concurrency, max_limit=concurrency, min_limit=concurrency)
+        completed = completed or {}
+        part_urls = self._presigned_urls(
+            uuid,
+            type,
+            upload_id,
+            urls,
+            total_parts=len(urls),
+            done=list(completed),
+            file_type=file_type,
+            options=options,
+        )
+        self.storage.reserve(controller.max_limit)
+        failed = threading.Event()
+        futures = []
+
+        pending = []
+        for index in range(len(urls)):
+            part_number = index + 1
+            offset = index * part_size
+            length = min(part_size, file_size - offset)
+            if length <= 0:
+                break
+            if part_number in completed:
+                if progress:
+                    progress.add(length)
+                if file_hash is not None:
+                    # already uploaded, read back by the hasher
+                    file_hash.add_range(offset, offset + length)
+                continue
+            file_part = FileSlice(file_path, offset, length, progress)
+            file_part.hasher = file_hash
+            pending.append((part_number, file_part))
+
+        # bytes of memory_budget held by each preloaded part
+        reserved: Dict[int, int] = {}
+
+        def discard_part(part_number: int, file_part: FileSlice) -> None:
+            file_part.close()
+            size = reserved.pop(part_number, 0)
+            if size:
+                memory_budget.release(size)
+
+        def upload_part(part_number: int, file_part: FileSlice) -> CompletedPart:
+            started_at = time.monotonic()
+            try:
+                if content_md5:
+                    file_part.compute_content_md5()
+                etag = self._upload_file_part(
+                    type=type,
+                    uuid=uuid,
+                    upload_id=upload_id,
+                    part_number=part_number,
+                    urls=part_urls,
+                    file_part=file_part,
+                    file_type=file_type,
+                    options=options,
+                    on_retry=controller.record_failure,
+                )
+            finally:
+                discard_part(part_number, file_part)
+            controller.record_success(file_part.length, time.monotonic() - started_at)
+            completed_part: CompletedPart = {"ETag": etag, "PartNumber": part_number}
+            if on_part_complete:
+                on_part_complete(completed_part)
+            return completed_part
+
+        def on_done(future) -> None:
+            if future.exception() is not None:
+                failed.set()
+            if part_slots is not None:
+                part_slots.release()
+            controller.release()
+
+        reader = None
+        stop_reading = threading.Event()
+        parts = iter(pending)
+        if read_ahead > 0 and pending:
+            # the bounded queue caps read-ahead memory to `read_ahead` parts
+            buffered: queue.Queue = queue.Queue(maxsize=read_ahead)
+
+            def read_parts() -> None:
+                try:
+                    for part in pending:
+                        if stop_reading.is_set():
+                            break
+                        if memory_budget is not None:
+                            reserved[part[0]] = memory_budget.acquire(part[1].length)
+                        part[1].preload(content_md5=content_md5)
+                        buffered.put(part)
+                except Exception as e:
+                    buffered.put(e)
+                    return
+                buffered.put(None)
+
+            def buffered_parts():
+                while (part := buffered.get()) is not None:
+                    if isinstance(part, Exception):
+                        raise part
+                    yield part
+
+            reader = threading.Thread(target=read_parts, daemon=True)
+            reader.start()
+            parts = buffered_parts()
+
+        try:
+            # a slot is taken before submitting a part, so no more parts are queued than can be sent
+            with ThreadPoolExecutor(max_workers=controller.max_limit) as executor:
+                for part_number, file_part in parts:
+                    controller.acquire()
+                    if part_slots is not None:
+                        part_slots.acquire()
+                    if failed.is_set():
+                        if part_slots is not None:
+                            part_slots.release()
+                        controller.release()
+                        discard_part(part_number, file_part)
+                        break
+
+                    future = executor.submit(upload_part, part_number, file_part)
+                    future.add_done_callback(on_done)
+                    futures.append(future)
+        finally:
+            if reader is not None:
+                # unblock and stop the reader, dropping parts it already buffered
+                stop_reading.set()
+                while reader.is_alive() or not buffered.empty():
+                    try:
+                        part = buffered.get(timeout=0.1)
+                        if isinstance(part, tuple):
+                            discard_part(part[0], part[1])
+                    except queue.Empty:
+                        pass
+            # parts the reader failed on before queueing them
+            for part_number in list(reserved):
+                memory_budget.release(reserved.pop(part_number))
+
+        # raises the first part failure, if any
+        completed_parts: List[CompletedPart] = [
+            {"ETag": etag, "PartNumber": part_number}
+            for part_number, etag in completed.items()
+        ]
+        completed_parts += [future.result() for future in futures]
+        return sorted(completed_parts, key=lambda part: part["PartNumber"])
+
+    def _resume_upload(
+        self,
+        journal: UploadJournal,
+        type: FileType,
+        file_size: int,
+        file_mtime_ns: int,
+        file_type: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+    ) -> Optional[tuple[UploadJournalState, List[Optional[str]]]]:
+        """
+        Loads a journaled upload of the same file and checks it is still alive on the server
+        Args:
+            journal (UploadJournal): upload journal
+            type (FileType): type of file to upload
+            file_size (int): current file size
+            file_mtime_ns (int): current file modification time
+            file_type (str): file type
+        Returns:
+            Optional[tuple[UploadJournalState, List[Optional[str]]]]: upload state to resume and
+                part urls (None for parts refreshed on use), None to start a new upload
+        """
+        state = journal.load(file_size, file_mtime_ns)
+        if state is None:
+            return None
+        if state.get("type") != getattr(type, "value", type):
+            journal.discard()
+            return None
+
+        missing = [
+            part_number
+            for part_number in range(1, state["totalParts"] + 1)
+            if part_number not in state["parts"]
+        ]
+        urls: List[Optional[str]] = [None] * state["totalParts"]
+        if missing:
+            # an expired or aborted upload can't be resumed, start over
+            try:
+                urls[missing[0] - 1] = self._refresh_part_url(
+                    state["uuid"], type, state["uploadId"], missing[0], file_type, options
+                )
+            except requests.exceptions.HTTPError:
+                journal.discard()
+                return None
+
+        print(
+            f"Resuming upload {state['uploadId']}, "
+            f"{len(state['parts'])}/{state['totalParts']} parts already uploaded."
+        )
+        return state, urls
+
+    def _start_upload(
+        self,
+        type: FileType,
+        path: Path,
+        total_parts: int,
+        uuid: Optional[str] = None,
+        options: Optional[UploadFileOptions] = None,
+    ) -> tuple[Optional[str], str, List[str]]:
+        """
+        Creates a multipart upload
+        Args:
+            type (FileType): type of file to upload
+            path (Path): file path
+            total_parts (int): number of parts
+            uuid (Optional[str]): resource uuid, if it already exists
+        Returns:
+            tuple[Optional[str], str, List[str]]: resource uuid, upload id and part presigned urls
+        """
+        create_upload_endpoint = self._get_create_upload_endpoint(type, uuid)
+        create_payload = self._build_create_payload(
+            type=type,
+            parts=total_parts,
+            path=path,
+            options=options,
+        )
+
+        # create multipart upload
+        multipart_upload: MultipartUpload = self._create_multipart_upload(
+            endpoint=create_upload_endpoint, request_data=create_payload
+        )
+
+        # if type == FileType.DREAM and it doesn't have uuid (created on multipart request for dreams), set uuid
+        if (
+            uuid is None
+            and type == FileType.DREAM
+            and multipart_upload is not None
+            and (dream := multipart_upload.get("dream")) is not None
+        ):
+            if not isinstance(dream, dict):
+                raise Exception(f"Multipart upload dream is not a dict. Type: {type(dream)}, Value: {dream}")
+            if "uuid" not in dream:
+                raise Exception(f"Multipart upload dream object missing 'uuid' key. Dream: {dream}, MultipartUpload: {multipart_upload}")
+            uuid = dream["uuid"]
+
+        return uuid, multipart_upload["uploadId"], multipart_upload["urls"]
+
+    def _build_controller(
+        self, options: Optional[UploadFileOptions] = None
+    ) -> AimdController:
+        """
+        Builds the parts in flight limit of an upload, fixed to options["concurrency"]
+        or adapted up to options["max_concurrency"] with adaptive concurrency
+        Args:
+            options (Optional[UploadFileOptions]): upload options
+        Returns:
+            AimdController: parts in flight limit
+        """
+        concurrency = (
+            options.get("concurrency") if options else None
+        ) or DEFAULT_UPLOAD_CONCURRENCY
+        if not (options and options.get("adaptive_concurrency")):
+            return AimdController(concurrency, max_limit=concurrency, min_limit=concurrency)
+        max_concurrency = max(
+            options.get("max_concurrency") or DEFAULT_MAX_UPLOAD_CONCURRENCY,
+            concurrency,
+        )
+        return AimdController(concurrency, max_limit=max_concurrency)
+
+    def _complete_upload(
+        self,
+        type: FileType,
+        uuid: Optional[str],
+        upload_id: str,
+        path: Path,
+        parts: List[CompletedPart],
+        options: Optional[UploadFileOptions] = None,
+    ) -> Optional[Dream]:
+        """
+        Completes a multipart upload
+        Args:
+            type (FileType): type of uploaded file
+            uuid (Optional[str]): resource uuid
+            upload_id (str): generated multipart upload id
+            path (Path): file path, names the dream and gives the extension
+            parts (List[CompletedPart]): completed parts sorted by part number
+        Returns:
+            Optional[Dream]: uploaded dream, None for KEYFRAME uploads
+        """
+        complete_upload_endpoint = self._get_complete_upload_endpoint(type, uuid)
+
+        complete_payload = self._build_complete_payload(
+            upload_id=upload_id,
+            parts=parts,
             path=path,
             type=type,
             options=options,
@@ -645,11 +1822,7 @@ class FileClient:
             endpoint=complete_upload_endpoint, request_data=complete_payload
         )
 
-        if progress_callback:
-            try:
-                progress_callback(file_size, file_size, 100.0)
-            except Exception as e:
-                print(f"Warning: Progress callback error: {e}")
+        dream = None
         if type in [FileType.DREAM, FileType.FILMSTRIP, FileType.THUMBNAIL]:
             if "dream" not in completed_upload:
                 raise Exception(f"Upload completed but response missing 'dream' key. Response: {completed_upload}")
@@ -660,6 +1833,495 @@ class FileClient:
                 raise Exception(f"Upload completed but dream is not a dict. Type: {type(dream)}, Value: {dream}")
             if "uuid" not in dream:
                 raise Exception(f"Upload completed but dream object missing 'uuid' key. Dream: {dream}")
-            return dream
+        return dream
 
+    def _find_duplicate(
+        self,
+        index: DedupIndex,
+        file_path: str,
+        file_size: int,
+        file_mtime_ns: int,
+        type: FileType,
+    ) -> tuple[Optional[str], Optional[Dream]]:
+        """
+        Looks up an identical file uploaded before, checking its dream still exists. The
+        index entry is forgotten only if the dream is not found, deleted or failed
+        Args:
+            index (DedupIndex): dedup index
+            file_path (str): file path
+            file_size (int): file size
+            file_mtime_ns (int): file modification time
+            type (FileType): type of file to upload
+        Returns:
+            tuple[Optional[str], Optional[Dream]]: file md5 if known, and the existing dream
+        """
+        type_value = getattr(type, "value", type)
+        md5 = index.get_file_md5(file_path, file_size, file_mtime_ns)
+        # files of a size never uploaded can't be duplicates, their md5 is computed while uploading
+        if md5 is None and index.has_size(file_size, type_value):
+            file_hash = hashlib.md5()
+            with FileSlice(file_path, 0, file_size) as file_slice:
+                file_slice.update_hash(file_hash)
+            md5 = file_hash.hexdigest()
+            index.put_file_md5(file_path, file_size, file_mtime_ns, md5)
+        if md5 is None:
+            return None, None
+
+        uuid = index.find(md5, file_size, type_value)
+        if uuid is None:
+            return md5, None
+        try:
+            dream = self.dream_client.get_dream(uuid)
+        except requests.exceptions.HTTPError as e:
+            # other errors, such as rate limits, don't tell the dream is gone
+            if e.response is None or e.response.status_code != 404:
+                raise
+            dream = None
+        if not dream or dream.get("deleted_at") or dream.get("status") == "failed":
+            index.forget(uuid)
+            return md5, None
+        return md5, dream
+
+    def upload_file(
+        self,
+        file_path: str,
+        type: FileType,
+        options: Optional[UploadFileOptions] = None,
+    ) -> Dream | bool | Any:
+        """
+        This function should be made private in future versions.
+        Complete function to upload file to s3 creating a resource on process.
+        Args:
+            file_path (str): file path
+            type (FileType): type of file to upload
+        Returns:
+            Dream | bool | Any: created resource after completing upload
+        """
+        result = self.upload_file_with_result(file_path, type, options)
+        if result["dream"] is not None:
+            return result["dream"]
         return True
+
+    def upload_file_with_result(
+        self,
+        file_path: str,
+        type: FileType,
+        options: Optional[UploadFileOptions] = None,
+    ) -> UploadResult:
+        """
+        Uploads file to s3 creating a resource on process, like upload_file, returning upload details
+        Args:
+            file_path (str): file path
+            type (FileType): type of file to upload
+        Returns:
+            UploadResult: created resource and upload details, such as the file md5
+        """
+        return self._upload_file(file_path, type, options)
+
+    def upload_stream(
+        self,
+        stream: Union[BinaryIO, Iterable[bytes]],
+        file_name: str,
+        type: FileType = FileType.DREAM,
+        options: Optional[UploadFileOptions] = None,
+        size: Optional[int] = None,
+    ) -> UploadResult:
+        """
+        Uploads a stream of unknown length to s3 creating a resource on process, sending
+        fixed-size parts as data arrives, without a temporary file. Part urls are requested
+        as parts are read, and at most (concurrency + 1) parts are held in memory
+        Args:
+            stream (Union[BinaryIO, Iterable[bytes]]): readable binary stream, such as an
+                encoder pipe, or an iterable of byte chunks
+            file_name (str): file name, gives the extension and the default dream name
+            type (FileType): type of file to upload, KEYFRAME is not supported
+            options (Optional[UploadFileOptions]): upload options, "resumable" and "dedup"
+                don't apply to streams
+            size (Optional[int]): expected stream size, if known, used to choose the part
+                size and to report progress percentage
+        Returns:
+            UploadResult: created resource and upload details
+        """
+        if type not in [FileType.DREAM, FileType.THUMBNAIL, FileType.FILMSTRIP]:
+            raise Exception(f"Type not allowed.")
+
+        path = Path(file_name)
+        file_extension = path.suffix.lstrip(".")
+        controller = self._build_controller(options)
+        part_size = options.get("part_size") if options else None
+        if part_size:
+            # a stream of unknown length may need several parts, the S3 minimum applies
+            validate_part_size(size if size is not None else part_size + 1, part_size)
+        elif size:
+            part_size = calculate_part_size(size, controller.max_limit)
+        else:
+            # unknown length, caps the stream at S3_MAX_PARTS * MIN_PART_SIZE
+            part_size = max(MIN_PART_SIZE, S3_MIN_PART_SIZE)
+
+        uuid, upload_id, urls = self._start_upload(
+            type=type,
+            path=path,
+            total_parts=1,
+            uuid=options.get("uuid") if options else None,
+            options=options,
+        )
+
+        progress_callback = options.get("progress_callback") if options else None
+        progress_interval = options.get("progress_interval", 1.0) if options else 1.0
+        progress = (
+            UploadProgress(progress_callback, progress_interval, size)
+            if progress_callback
+            else None
+        )
+        if progress:
+            progress.report(0)
+
+        # only the first url comes with the upload, the rest are requested in batches on use
+        part_urls = self._presigned_urls(
+            uuid,
+            type,
+            upload_id,
+            urls[:1],
+            total_parts=S3_MAX_PARTS,
+            file_type=file_extension,
+            options=options,
+        )
+        content_md5 = bool(options and options.get("content_md5"))
+        file_hash = hashlib.md5() if options and options.get("md5") else None
+        self.storage.reserve(controller.max_limit)
+        failed = threading.Event()
+        futures = []
+        file_size = 0
+
+        def upload_part(part_number: int, file_part: FileSlice) -> CompletedPart:
+            started_at = time.monotonic()
+            try:
+                etag = self._upload_file_part(
+                    type=type,
+                    uuid=uuid,
+                    upload_id=upload_id,
+                    part_number=part_number,
+                    urls=part_urls,
+                    file_part=file_part,
+                    file_type=file_extension,
+                    options=options,
+                    on_retry=controller.record_failure,
+                )
+            finally:
+                file_part.close()
+            controller.record_success(file_part.length, time.monotonic() - started_at)
+            return {"ETag": etag, "PartNumber": part_number}
+
+        def on_done(future) -> None:
+            if future.exception() is not None:
+                failed.set()
+            controller.release()
+
+        with ThreadPoolExecutor(max_workers=controller.max_limit) as executor:
+            # the next part is read while previous parts are sent, so the producer isn't blocked
+            for index, buffer in enumerate(iter_stream_parts(stream, part_size)):
+                part_number = index + 1
+                if part_number > S3_MAX_PARTS:
+                    raise ValueError(
+                        f"Stream exceeds {S3_MAX_PARTS} parts of {part_size} bytes, "
+                        f"set a larger options['part_size']"
+                    )
+                file_size += len(buffer)
+                if file_hash is not None:
+                    file_hash.update(buffer)
+                file_part = FileSlice.from_buffer(buffer, progress, content_md5=content_md5)
+
+                controller.acquire()
+                if failed.is_set():
+                    controller.release()
+                    file_part.close()
+                    break
+                future = executor.submit(upload_part, part_number, file_part)
+                future.add_done_callback(on_done)
+                futures.append(future)
+
+        # raises the first part failure, if any
+        completed_parts = [future.result() for future in futures]
+        dream = self._complete_upload(
+            type=type,
+            uuid=uuid,
+            upload_id=upload_id,
+            path=path,
+            parts=completed_parts,
+            options=options,
+        )
+        if progress:
+            progress.total_size = progress.total_size or file_size
+            progress.report(file_size)
+
+        return {
+            "dream": dream,
+            "uuid": uuid,
+            "upload_id": upload_id,
+            "file_size": file_size,
+            "part_size": part_size,
+            "total_parts": len(completed_parts),
+            "md5": file_hash.hexdigest() if file_hash is not None else None,
+            "deduplicated": False,
+            "concurrency": controller.limit,
+            "throughput": controller.throughput,
+        }
+
+    def _upload_file(
+        self,
+        file_path: str,
+        type: FileType,
+        options: Optional[UploadFileOptions] = None,
+        part_slots: Optional[threading.Semaphore] = None,
+        memory_budget: Optional[ByteBudget] = None,
+    ) -> UploadResult:
+        """
+        Uploads file to s3 creating a resource on process
+        Args:
+            file_path (str): file path
+            type (FileType): type of file to upload
+            part_slots (Optional[threading.Semaphore]): parts in flight limit shared with other uploads
+            memory_budget (Optional[ByteBudget]): bytes of read-ahead buffers shared with other uploads
+        Returns:
+            UploadResult: created resource and upload details
+        """
+
+        if type not in [
+            FileType.DREAM,
+            FileType.THUMBNAIL,
+            FileType.FILMSTRIP,
+            FileType.KEYFRAME,
+        ]:
+            raise Exception(f"Type not allowed.")
+
+        path = Path(file_path)
+        file_extension = path.suffix.lstrip(".")
+        file_stat = path.stat()
+        file_size = file_stat.st_size
+
+        # Extract options
+        uuid = options.get("uuid") if options else None
+        controller = self._build_controller(options)
+        part_size = options.get("part_size") if options else None
+        if part_size:
+            validate_part_size(file_size, part_size)
+        else:
+            # enough parts to grow into the max concurrency
+            part_size = calculate_part_size(file_size, controller.max_limit)
+        total_parts = calculate_total_parts(file_size, part_size)
+
+        # Skip the upload if the same content already created a dream, only new dreams are deduplicated
+        dedup_index = None
+        md5 = None
+        if options and options.get("dedup") and type == FileType.DREAM and uuid is None:
+            dedup_index = DedupIndex(options.get("dedup_index"))
+            md5, dream = self._find_duplicate(
+                dedup_index,
+                file_path,
+                file_size=file_size,
+                file_mtime_ns=file_stat.st_mtime_ns,
+                type=type,
+            )
+            if dream is not None:
+                print(f"Skipping upload of {file_path}, identical to dream {dream['uuid']}.")
+                return {
+                    "dream": dream,
+                    "uuid": dream["uuid"],
+                    "upload_id": None,
+                    "file_size": file_size,
+                    "part_size": part_size,
+                    "total_parts": 0,
+                    "md5": md5,
+                    "deduplicated": True,
+                    "concurrency": 0,
+                    "throughput": 0.0,
+                }
+
+        # Resume a journaled upload of the same file, keyframe urls can't be refreshed
+        journal = None
+        resumed = None
+        if options and options.get("resumable") and type != FileType.KEYFRAME:
+            journal = UploadJournal.for_file(
+                file_path,
+                type,
+                uuid=uuid,
+                frame_number=options.get("frame_number"),
+                journal_dir=options.get("journal_dir"),
+            )
+            resumed = self._resume_upload(
+                journal,
+                type=type,
+                file_size=file_size,
+                file_mtime_ns=file_stat.st_mtime_ns,
+                file_type=file_extension,
+                options=options,
+            )
+
+        if resumed is not None:
+            state, urls = resumed
+            uuid = state["uuid"]
+            upload_id = state["uploadId"]
+            part_size = state["partSize"]
+            total_parts = state["totalParts"]
+            completed = state["parts"]
+        else:
+            uuid, upload_id, urls = self._start_upload(
+                type=type,
+                path=path,
+                total_parts=total_parts,
+                uuid=uuid,
+                options=options,
+            )
+            completed = {}
+            if journal:
+                journal.start(
+                    {
+                        "uploadId": upload_id,
+                        "uuid": uuid,
+                        "type": getattr(type, "value", type),
+                        "partSize": part_size,
+                        "totalParts": total_parts,
+                        "fileSize": file_size,
+                        "fileMtimeNs": file_stat.st_mtime_ns,
+                    }
+                )
+
+        progress_callback = options.get("progress_callback") if options else None
+        progress_interval = options.get("progress_interval", 1.0) if options else 1.0
+        # the dedup index needs the md5 of new content, computed in the same pass as the upload
+        file_hash = (
+            OrderedFileHasher(file_path)
+            if options and (options.get("md5") or (dedup_index and md5 is None))
+            else None
+        )
+        progress = (
+            UploadProgress(progress_callback, progress_interval, file_size)
+            if progress_callback
+            else None
+        )
+
+        if progress:
+            progress.report(0)
+
+        try:
+            completed_parts = self._upload_parts(
+                uuid=uuid,
+                type=type,
+                upload_id=upload_id,
+                urls=urls,
+                file_path=file_path,
+                file_size=file_size,
+                part_size=part_size,
+                file_type=file_extension,
+                options=options,
+                progress=progress,
+                controller=controller,
+                read_ahead=(options.get("read_ahead") if options else None) or 0,
+                content_md5=bool(options and options.get("content_md5")),
+                file_hash=file_hash,
+                completed=completed,
+                part_slots=part_slots,
+                memory_budget=memory_budget,
+                on_part_complete=(
+                    (lambda part: journal.record_part(part["PartNumber"], part["ETag"]))
+                    if journal
+                    else None
+                ),
+            )
+            if file_hash is not None:
+                md5 = file_hash.hexdigest(file_size)
+        finally:
+            if file_hash is not None:
+                file_hash.close()
+
+        dream = self._complete_upload(
+            type=type,
+            uuid=uuid,
+            upload_id=upload_id,
+            path=path,
+            parts=completed_parts,
+            options=options,
+        )
+
+        if journal:
+            journal.discard()
+        if progress:
+            progress.report(file_size)
+
+        if dedup_index is not None and uuid is not None:
+            dedup_index.put_file_md5(file_path, file_size, file_stat.st_mtime_ns, md5)
+            dedup_index.put(md5, file_size, getattr(type, "value", type), uuid)
+
+        return {
+            "dream": dream,
+            "uuid": uuid,
+            "upload_id": upload_id,
+            "file_size": file_size,
+            "part_size": part_size,
+            "total_parts": total_parts,
+            "md5": md5,
+            "deduplicated": False,
+            "concurrency": controller.limit,
+            "throughput": controller.throughput,
+        }
+
+    def upload_many(
+        self,
+        paths: Union[str, List[str]],
+        type: FileType = FileType.DREAM,
+        options: Optional[UploadFileOptions] = None,
+        jobs: int = DEFAULT_UPLOAD_JOBS,
+        max_parts_in_flight: Optional[int] = None,
+        memory_budget: int = DEFAULT_UPLOAD_MEMORY_BUDGET,
+    ) -> List[UploadManyResult]:
+        """
+        Uploads many files concurrently, a failed file doesn't stop the others
+        Args:
+            paths (Union[str, List[str]]): directory, file path, or list of them
+            type (FileType): type of files to upload (default DREAM)
+            options (Optional[UploadFileOptions]): options shared by every file, except
+                "name" (dreams are named after their files)
+            jobs (int): number of files uploaded at once
+            max_parts_in_flight (Optional[int]): parts in flight across all files
+                (defaults to jobs * options["concurrency"], or jobs * options["max_concurrency"]
+                with adaptive concurrency)
+            memory_budget (int): bytes of parts held by read-ahead (options["read_ahead"])
+                across all files, only read-ahead buffers reserve it, parts streamed
+                from disk aren't counted
+        Returns:
+            List[UploadManyResult]: results, in the order of the given paths
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        file_paths: List[str] = []
+        for path in paths:
+            if os.path.isdir(path):
+                file_paths.extend(list_media_files(path))
+            else:
+                file_paths.append(path)
+
+        file_options: UploadFileOptions = {
+            k: v for k, v in (options or {}).items() if k != "name"
+        }
+        jobs = max(min(int(jobs), len(file_paths)), 1)
+        concurrency = self._build_controller(file_options).max_limit
+        part_slots = threading.Semaphore(max_parts_in_flight or jobs * concurrency)
+        budget = ByteBudget(memory_budget)
+        self.storage.reserve(jobs * concurrency)
+
+        def upload(file_path: str) -> UploadManyResult:
+            try:
+                result = self._upload_file(
+                    file_path,
+                    type,
+                    file_options,
+                    part_slots=part_slots,
+                    memory_budget=budget,
+                )
+                return {"file_path": file_path, "success": True, "result": result}
+            except Exception as e:
+                print(f"Failed to upload {file_path}: {e}")
+                return {"file_path": file_path, "success": False, "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(upload, file_paths))
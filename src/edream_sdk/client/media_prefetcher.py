@@ -0,0 +1,194 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, List, Dict, Iterator, Tuple, Set
+from ..client.file_client import FileClient
+from ..types.dream_types import Dream
+from ..utils.cache_utils import MediaCache
+
+DEFAULT_PREFETCH_AHEAD = 3
+DEFAULT_PREFETCH_JOBS = 2
+
+
+def get_dream_video_size(dream: Dream) -> int:
+    """
+    Returns the size of a dream video as reported by the api
+    Args:
+        dream (Dream): dream
+    Returns:
+        int: size in bytes, 0 if unknown
+    """
+    try:
+        return int(dream.get("processedVideoSize") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class MediaPrefetcher:
+    """
+    Keeps the videos of the dreams at and after a play cursor downloaded to the
+    media cache, so moving to the next dream doesn't wait for its download.
+    The window holds the current dream and the next `ahead` ones, less if their
+    sizes exceed `max_bytes` or the cache budget, and moves with the cursor:
+    downloads that left it and haven't started are cancelled. Dreams in the window
+    are pinned in the cache, so caching the next ones doesn't evict them. Dreams
+    already cached aren't downloaded
+    """
+
+    def __init__(
+        self,
+        file_client: FileClient,
+        dreams: List[Dream],
+        ahead: int = DEFAULT_PREFETCH_AHEAD,
+        jobs: int = DEFAULT_PREFETCH_JOBS,
+        max_bytes: Optional[int] = None,
+    ):
+        self.file_client = file_client
+        # dreams without a video, such as those still processing, can't be played
+        self.dreams = [dream for dream in dreams if dream.get("video")]
+        self.ahead = max(ahead, 0)
+        self.max_bytes = max_bytes
+        self.cursor = 0
+        if self.file_client.media_cache is None:
+            self.file_client.media_cache = MediaCache()
+        self._cache = self.file_client.media_cache
+        self._executor = ThreadPoolExecutor(max_workers=max(jobs, 1))
+        self._futures: Dict[int, Future] = {}
+        self._pinned: Set[int] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.seek(0)
+
+    def __len__(self) -> int:
+        return len(self.dreams)
+
+    def __enter__(self) -> "MediaPrefetcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _get_window(self) -> List[int]:
+        # a window larger than the cache would evict its own media
+        max_bytes = self._cache.max_bytes
+        if self.max_bytes is not None:
+            max_bytes = min(self.max_bytes, max_bytes)
+        window = []
+        total = 0
+        for index in range(self.cursor, min(self.cursor + self.ahead + 1, len(self.dreams))):
+            total += get_dream_video_size(self.dreams[index])
+            if window and total > max_bytes:
+                break
+            window.append(index)
+        return window
+
+    def _submit(self, index: int) -> Future:
+        dream = self.dreams[index]
+        future = self._futures.get(index)
+        if future is not None:
+            return future
+        path = self._cache.get(dream["video"], dream.get("md5"))
+        if path is not None and (not dream.get("md5") or self._cache.is_verified(dream["video"], dream["md5"])):
+            # cached already, no worker needed
+            future = Future()
+            future.set_result(path)
+        else:
+            future = self._executor.submit(
+                self.file_client.download_cached, dream["video"], md5=dream.get("md5")
+            )
+        self._futures[index] = future
+        return future
+
+    def _pin(self, index: int) -> None:
+        if index not in self._pinned:
+            self._pinned.add(index)
+            self._cache.pin(self.dreams[index]["video"], self.dreams[index].get("md5"))
+
+    def _unpin(self, index: int) -> None:
+        if index in self._pinned:
+            self._pinned.discard(index)
+            self._cache.unpin(self.dreams[index]["video"], self.dreams[index].get("md5"))
+
+    def _schedule(self) -> None:
+        window = self._get_window()
+        for index, future in list(self._futures.items()):
+            # running downloads outside the window finish into the cache
+            if index not in window and (future.done() or future.cancel()):
+                del self._futures[index]
+        for index in list(self._pinned):
+            if index not in window:
+                self._unpin(index)
+        for index in window:
+            # pinned before the download, so caching it can't evict the window
+            self._pin(index)
+            self._submit(index)
+
+    def seek(self, index: int) -> None:
+        """
+        Moves the play cursor and prefetches the window after it
+        Args:
+            index (int): index of the current dream
+        """
+        if not 0 <= index <= len(self.dreams):
+            raise IndexError(f"Dream index {index} out of range")
+        with self._lock:
+            if self._closed:
+                raise Exception("Prefetcher is closed")
+            self.cursor = index
+            self._schedule()
+
+    def advance(self) -> int:
+        """
+        Moves the play cursor to the next dream
+        Returns:
+            int: new cursor, len(self) once past the last dream
+        """
+        self.seek(min(self.cursor + 1, len(self.dreams)))
+        return self.cursor
+
+    def get(self, index: Optional[int] = None) -> str:
+        """
+        Returns the local video of a dream, waiting for its download if needed. A
+        failed download raises and is tried again on the next call
+        Args:
+            index (Optional[int]): dream index, the cursor if None
+        Returns:
+            str: cached video path
+        """
+        index = self.cursor if index is None else index
+        if not 0 <= index < len(self.dreams):
+            raise IndexError(f"Dream index {index} out of range")
+        with self._lock:
+            future = self._submit(index)
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                if self._futures.get(index) is future:
+                    del self._futures[index]
+            raise
+
+    def __iter__(self) -> Iterator[Tuple[Dream, str]]:
+        """
+        Walks the dreams from the cursor, moving it along
+        Returns:
+            Iterator[Tuple[Dream, str]]: dreams and their local video paths
+        """
+        index = self.cursor
+        while index < len(self.dreams):
+            self.seek(index)
+            yield self.dreams[index], self.get(index)
+            index = self.cursor + 1
+
+    def close(self) -> None:
+        """
+        Cancels pending downloads and waits for running ones
+        """
+        with self._lock:
+            self._closed = True
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for index in list(self._pinned):
+                self._unpin(index)
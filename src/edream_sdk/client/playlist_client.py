@@ -1,10 +1,35 @@
-from typing import Optional, Any
+import os
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from functools import partial
+from typing import Optional, Any, List, Union, Set, Dict, Tuple, Iterator
 from dataclasses import asdict
 from ..client.api_client import ApiClient
-from ..client.file_client import FileClient
+from ..client.file_client import (
+    FileClient,
+    DEFAULT_UPLOAD_JOBS,
+    DEFAULT_UPLOAD_MEMORY_BUDGET,
+    DEFAULT_DOWNLOAD_JOBS,
+    DEFAULT_DOWNLOAD_CONCURRENCY,
+)
+from ..client.media_prefetcher import (
+    MediaPrefetcher,
+    DEFAULT_PREFETCH_AHEAD,
+    DEFAULT_PREFETCH_JOBS,
+)
 from ..types.dream_types import Dream
 from ..types.keyframe_types import Keyframe
 from ..types.dream_types import DreamFileType
+from ..types.file_upload_types import UploadFileOptions
+from ..types.file_download_types import (
+    PlaylistManifest,
+    PlaylistManifestDream,
+    PlaylistManifestFile,
+    DownloadPlaylistFailure,
+    DownloadPlaylistResult,
+)
 from ..types.playlist_types import (
     Playlist,
     PlaylistItem,
@@ -17,14 +42,85 @@ from ..types.playlist_types import (
     PlaylistKeyframeResponseWrapper,
     PlaylistItemsResponseWrapper,
     PlaylistKeyframesResponseWrapper,
+    PlaylistTree,
+    PlaylistItemResult,
+    PlaylistSyncResult,
+    AddFileToPlaylistResult,
 )
 from ..utils.file_utils import verify_file_path
+from ..utils.concurrency_utils import AimdController, get_retry_after
+from ..utils.playlist_utils import match_playlist_items, plan_playlist_order
+from ..utils.snapshot_utils import PlaylistSnapshotStore
+from ..utils.pagination_utils import (
+    fetch_all_pages,
+    iter_pages,
+    MAX_PAGE_SIZE,
+    DEFAULT_PAGE_JOBS,
+)
+from ..utils.download_utils import (
+    strip_url_query,
+    load_playlist_manifest,
+    save_playlist_manifest,
+)
+
+DEFAULT_PLAYLIST_MAX_DEPTH = 8
+DEFAULT_RESOLVE_JOBS = 4
+DEFAULT_PLAYLIST_ITEM_JOBS = 8
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BACKOFF = 1.0
+RATE_LIMIT_MAX_DELAY = 60.0
+PLAYLIST_MANIFEST_NAME = "manifest.json"
+
+
+def get_sorted_playlist_items(playlist: Playlist) -> List[PlaylistItem]:
+    """
+    Returns the items of a playlist in play order
+    Args:
+        playlist (Playlist): playlist with its items
+    Returns:
+        List[PlaylistItem]: items sorted by order
+    """
+    return sorted(playlist.get("items") or [], key=lambda item: item.get("order") or 0)
+
+
+def get_nested_playlist_uuids(playlist: Playlist) -> List[str]:
+    """
+    Returns the uuids of the playlists nested in a playlist, in play order
+    Args:
+        playlist (Playlist): playlist with its items
+    Returns:
+        List[str]: nested playlist uuids, without repeats
+    """
+    uuids = []
+    for item in get_sorted_playlist_items(playlist):
+        nested = item.get("playlistItem")
+        if item.get("type") == PlaylistItemType.PLAYLIST.value and nested and nested.get("uuid"):
+            if nested["uuid"] not in uuids:
+                uuids.append(nested["uuid"])
+    return uuids
+
+
+def normalize_playlist_items(
+    items: List[Union[str, Tuple[PlaylistItemType, str]]]
+) -> List[Tuple[PlaylistItemType, str]]:
+    """
+    Returns playlist entries as (type, uuid) pairs, bare uuids being dreams
+    Args:
+        items (List[Union[str, Tuple[PlaylistItemType, str]]]): dream uuids or (type, uuid) pairs
+    Returns:
+        List[Tuple[PlaylistItemType, str]]: (type, uuid) pairs
+    """
+    return [
+        (PlaylistItemType.DREAM, item) if isinstance(item, str) else item
+        for item in items
+    ]
 
 
 class PlaylistClient:
     def __init__(self, api_client: ApiClient, file_client: FileClient):
         self.api_client = api_client
         self.file_client = file_client
+        self.snapshot_store: Optional[PlaylistSnapshotStore] = None
 
     def create_playlist(self, data: CreatePlaylistRequest) -> Playlist:
         """
@@ -39,40 +135,411 @@ class PlaylistClient:
         playlist = response_data["playlist"]
         return playlist
 
-    def get_playlist(self, uuid: str, auto_populate: bool = True) -> Playlist:
+    def get_playlist(
+        self, uuid: str, auto_populate: bool = True, page_jobs: int = DEFAULT_PAGE_JOBS
+    ) -> Playlist:
         """
-        Retrieves a playlist by its uuid with optional population of items and keyframes
+        Retrieves a playlist by its uuid with optional population of items and keyframes.
+        The playlist, its items and its keyframes are fetched in parallel, in pages of the
+        largest size the server serves, the first page of each telling how many follow
         Args:
             uuid (str): playlist uuid
             auto_populate (bool): whether to fetch and populate items and keyframes (default True)
+            page_jobs (int): pages of items, and of keyframes, fetched at once
         Returns:
             Playlist: Found Playlist with items and playlistKeyframes populated if requested
         """
+        if not auto_populate:
+            return self._get_playlist(uuid)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            playlist_future = executor.submit(self._get_playlist, uuid)
+            items_future = executor.submit(
+                fetch_all_pages,
+                partial(self._get_playlist_items_page, uuid),
+                MAX_PAGE_SIZE,
+                page_jobs,
+            )
+            keyframes_future = executor.submit(
+                fetch_all_pages,
+                partial(self._get_playlist_keyframes_page, uuid),
+                MAX_PAGE_SIZE,
+                page_jobs,
+            )
+            playlist = playlist_future.result()
+            playlist["items"] = items_future.result()
+            playlist["playlistKeyframes"] = keyframes_future.result()
+        return playlist
+
+    def _get_playlist(self, uuid: str) -> Playlist:
         response = self.api_client.get(f"/playlist/{uuid}")
         data: PlaylistResponseWrapper = response["data"]
-        playlist = data["playlist"]
-
-        if auto_populate:
-            items_response = self.get_playlist_items(uuid, take=1, skip=0)
-            total_items = items_response["totalCount"]
-            
-            if total_items > 0:
-                all_items_response = self.get_playlist_items(uuid, take=total_items, skip=0)
-                playlist["items"] = all_items_response["items"]
-            else:
-                playlist["items"] = []
-
-            keyframes_response = self.get_playlist_keyframes(uuid, take=1, skip=0)
-            total_keyframes = keyframes_response["totalCount"]
-            
-            if total_keyframes > 0:
-                all_keyframes_response = self.get_playlist_keyframes(uuid, take=total_keyframes, skip=0)
-                playlist["playlistKeyframes"] = all_keyframes_response["keyframes"]
-            else:
-                playlist["playlistKeyframes"] = []
-        
+        return data["playlist"]
+
+    def _get_playlist_serially(self, uuid: str) -> Playlist:
+        # one request at a time, for callers bounding concurrency with their own jobs
+        playlist = self._get_playlist(uuid)
+        playlist["items"] = list(
+            iter_pages(partial(self._get_playlist_items_page, uuid), MAX_PAGE_SIZE, prefetch=False)
+        )
+        playlist["playlistKeyframes"] = list(
+            iter_pages(partial(self._get_playlist_keyframes_page, uuid), MAX_PAGE_SIZE, prefetch=False)
+        )
         return playlist
 
+    def _get_snapshot_store(self) -> PlaylistSnapshotStore:
+        if self.snapshot_store is None:
+            self.snapshot_store = PlaylistSnapshotStore()
+        return self.snapshot_store
+
+    def refresh_playlist_snapshot(
+        self, uuid: str, page_jobs: int = DEFAULT_PAGE_JOBS
+    ) -> bool:
+        """
+        Brings the local snapshot of a playlist up to date. A playlist whose updated_at
+        and itemCount didn't change costs one request. A changed one has its items and
+        keyframes fetched in concurrent pages, and only pages whose content changed are
+        rewritten, in one transaction
+        Args:
+            uuid (str): playlist uuid
+            page_jobs (int): pages of items, and of keyframes, fetched at once
+        Returns:
+            bool: True if the playlist changed since its snapshot, or had none
+        """
+        store = self._get_snapshot_store()
+        playlist = self._get_playlist(uuid)
+        version = store.get_version(uuid)
+        if (
+            version is not None
+            and playlist.get("updated_at") is not None
+            and version["updated_at"] == playlist.get("updated_at")
+            and version["itemCount"] == playlist.get("itemCount")
+        ):
+            store.touch(uuid)
+            return False
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            items_future = executor.submit(
+                fetch_all_pages,
+                partial(self._get_playlist_items_page, uuid),
+                MAX_PAGE_SIZE,
+                page_jobs,
+            )
+            keyframes_future = executor.submit(
+                fetch_all_pages,
+                partial(self._get_playlist_keyframes_page, uuid),
+                MAX_PAGE_SIZE,
+                page_jobs,
+            )
+            items = items_future.result()
+            keyframes = keyframes_future.result()
+        store.put(playlist, items, keyframes)
+        return True
+
+    def refresh_playlist_snapshots(
+        self, uuids: List[str], jobs: int = DEFAULT_RESOLVE_JOBS
+    ) -> Dict[str, bool]:
+        """
+        Brings the local snapshots of many playlists up to date concurrently
+        Args:
+            uuids (List[str]): playlist uuids
+            jobs (int): playlists refreshed at once
+        Returns:
+            Dict[str, bool]: whether each snapshot changed, failed refreshes are left out
+        """
+        changed: Dict[str, bool] = {}
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+            futures = {uuid: executor.submit(self.refresh_playlist_snapshot, uuid) for uuid in uuids}
+            for uuid, future in futures.items():
+                try:
+                    changed[uuid] = future.result()
+                except Exception as e:
+                    print(f"Snapshot of playlist {uuid} not refreshed: {e}")
+        return changed
+
+    def get_playlist_snapshot(
+        self, uuid: str, max_age: Optional[float] = None
+    ) -> Playlist:
+        """
+        Returns the local snapshot of a playlist with its items and keyframes,
+        refreshing it first unless it was checked within max_age seconds
+        Args:
+            uuid (str): playlist uuid
+            max_age (Optional[float]): seconds a snapshot is used without checking it
+        Returns:
+            Playlist: playlist with items and playlistKeyframes
+        """
+        store = self._get_snapshot_store()
+        version = store.get_version(uuid)
+        if (
+            version is None
+            or max_age is None
+            or time.time() - version["checkedAt"] > max_age
+        ):
+            self.refresh_playlist_snapshot(uuid)
+        return store.get(uuid)
+
+    def resolve_playlist_tree(
+        self,
+        playlist: Union[str, Playlist],
+        max_depth: int = DEFAULT_PLAYLIST_MAX_DEPTH,
+        jobs: int = DEFAULT_RESOLVE_JOBS,
+    ) -> PlaylistTree:
+        """
+        Retrieves a playlist and the playlists nested in it, down to max_depth levels.
+        Nested playlists are fetched concurrently as soon as their parent is, and once
+        each however many times they appear. A playlist nested in one of its own nested
+        playlists is reported as a cycle and not expanded again
+        Args:
+            playlist (Union[str, Playlist]): playlist uuid, or playlist with its items
+            max_depth (int): levels of nested playlists fetched
+            jobs (int): playlists fetched at once, each with one request at a time, so
+                at most `jobs` api requests are in flight
+        Returns:
+            PlaylistTree: playlists by uuid, their nesting and dreams in play order
+        """
+        playlists: Dict[str, Playlist] = {}
+        if isinstance(playlist, str):
+            root = playlist
+        else:
+            root = playlist["uuid"]
+            if playlist.get("items") is not None:
+                playlists[root] = playlist
+        # shallowest level each playlist was found at, deeper links may be found first
+        depths: Dict[str, int] = {}
+        futures: Dict[Future, str] = {}
+        submitted: Set[str] = set()
+
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+
+            def discover(uuid: str, depth: int) -> None:
+                if depth > max_depth or depth >= depths.get(uuid, max_depth + 1):
+                    return
+                depths[uuid] = depth
+                if uuid in playlists:
+                    for child in get_nested_playlist_uuids(playlists[uuid]):
+                        discover(child, depth + 1)
+                elif uuid not in submitted:
+                    submitted.add(uuid)
+                    futures[executor.submit(self._get_playlist_serially, uuid)] = uuid
+
+            discover(root, 0)
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    uuid = futures.pop(future)
+                    playlists[uuid] = future.result()
+                    for child in get_nested_playlist_uuids(playlists[uuid]):
+                        discover(child, depths[uuid] + 1)
+
+        tree: PlaylistTree = {
+            "root": root,
+            "playlists": playlists,
+            "children": {
+                uuid: get_nested_playlist_uuids(node) for uuid, node in playlists.items()
+            },
+            "dreams": [],
+            "cycles": [],
+        }
+
+        def flatten(uuid: str, depth: int, ancestors: Set[str]) -> None:
+            ancestors = ancestors | {uuid}
+            for item in get_sorted_playlist_items(playlists[uuid]):
+                if item.get("type") == PlaylistItemType.DREAM.value and item.get("dreamItem"):
+                    tree["dreams"].append(item["dreamItem"])
+                elif item.get("type") == PlaylistItemType.PLAYLIST.value and item.get("playlistItem"):
+                    child = item["playlistItem"].get("uuid")
+                    if child in ancestors:
+                        if [uuid, child] not in tree["cycles"]:
+                            tree["cycles"].append([uuid, child])
+                    elif depth < max_depth and child in playlists:
+                        flatten(child, depth + 1, ancestors)
+
+        flatten(root, 0, set())
+        return tree
+
+    def get_playlist_dreams(
+        self,
+        playlist: Union[str, Playlist],
+        max_depth: int = DEFAULT_PLAYLIST_MAX_DEPTH,
+    ) -> List[Dream]:
+        """
+        Retrieves the dreams of a playlist in play order, with nested playlists
+        expanded in place. A playlist nested in itself is expanded once
+        Args:
+            playlist (Union[str, Playlist]): playlist uuid, or playlist with its items
+            max_depth (int): levels of nested playlists expanded
+        Returns:
+            List[Dream]: dreams in play order
+        """
+        return self.resolve_playlist_tree(playlist, max_depth=max_depth)["dreams"]
+
+    def prefetch_playlist(
+        self,
+        playlist: Union[str, Playlist],
+        ahead: int = DEFAULT_PREFETCH_AHEAD,
+        jobs: int = DEFAULT_PREFETCH_JOBS,
+        max_bytes: Optional[int] = None,
+        max_depth: int = DEFAULT_PLAYLIST_MAX_DEPTH,
+    ) -> MediaPrefetcher:
+        """
+        Starts downloading the videos of a playlist, nested playlists included, to the
+        media cache ahead of a play cursor moved with seek or advance
+        Args:
+            playlist (Union[str, Playlist]): playlist uuid, or playlist with its items
+            ahead (int): dreams kept downloaded after the current one
+            jobs (int): videos downloaded at once
+            max_bytes (Optional[int]): bytes of videos kept ahead, from their processed size,
+                at most the media cache budget
+            max_depth (int): levels of nested playlists expanded
+        Returns:
+            MediaPrefetcher: prefetcher, to be closed once playback stops
+        """
+        dreams = self.get_playlist_dreams(playlist, max_depth=max_depth)
+        return MediaPrefetcher(
+            self.file_client, dreams, ahead=ahead, jobs=jobs, max_bytes=max_bytes
+        )
+
+    def download_playlist(
+        self,
+        uuid: str,
+        dest: str,
+        jobs: int = DEFAULT_DOWNLOAD_JOBS,
+        concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+        max_depth: int = DEFAULT_PLAYLIST_MAX_DEPTH,
+    ) -> DownloadPlaylistResult:
+        """
+        Downloads the videos, thumbnails and filmstrip frames of every dream of a
+        playlist, nested playlists included, to `<dest>/<dream uuid>/`. Media shared by
+        several dreams are downloaded once. A manifest mapping dreams to their files is
+        written to `<dest>/manifest.json`, so a later run only downloads media that are
+        missing or changed, and continues interrupted downloads
+        Args:
+            uuid (str): playlist uuid
+            dest (str): export directory
+            jobs (int): media downloaded at once
+            concurrency (int): byte ranges downloaded in parallel per media
+            max_depth (int): levels of nested playlists expanded
+        Returns:
+            DownloadPlaylistResult: manifest path, counts and failed media
+        """
+        dreams = self.get_playlist_dreams(uuid, max_depth=max_depth)
+        os.makedirs(dest, exist_ok=True)
+        manifest_path = os.path.join(dest, PLAYLIST_MANIFEST_NAME)
+        previous = load_playlist_manifest(manifest_path)
+        previous_files = previous["files"] if previous else {}
+
+        manifest: PlaylistManifest = {
+            "playlist": uuid,
+            "order": [],
+            "dreams": {},
+            "files": {},
+        }
+        # relative path by source url, so shared media are downloaded once
+        paths: Dict[str, str] = {}
+        downloads: List[Tuple[str, str, Optional[str]]] = []
+        for dream in dreams:
+            manifest["order"].append(dream["uuid"])
+            if dream["uuid"] in manifest["dreams"]:
+                continue
+            entry: PlaylistManifestDream = {
+                "name": dream.get("name"),
+                "video": None,
+                "thumbnail": None,
+                "filmstrip": [],
+            }
+            media = [("video", dream.get("video"), dream.get("md5"))]
+            media.append(("thumbnail", dream.get("thumbnail"), None))
+            for index, frame in enumerate(dream.get("filmstrip") or []):
+                media.append((f"filmstrip/{index}", frame, None))
+            for name, url, md5 in media:
+                if not url:
+                    continue
+                source = strip_url_query(url)
+                path = paths.get(source)
+                if path is None:
+                    extension = os.path.splitext(urlparse(url).path)[1]
+                    path = f"{dream['uuid']}/{name}{extension}"
+                    paths[source] = path
+                    manifest["files"][path] = {
+                        "url": source,
+                        "md5": md5,
+                        "updatedAt": dream.get("updated_at"),
+                        "size": 0,
+                    }
+                    downloads.append((path, url, md5))
+                if name.startswith("filmstrip/"):
+                    entry["filmstrip"].append(path)
+                else:
+                    entry[name] = path
+            manifest["dreams"][dream["uuid"]] = entry
+
+        def is_up_to_date(path: str) -> bool:
+            file = manifest["files"][path]
+            previous_file: Optional[PlaylistManifestFile] = previous_files.get(path)
+            if previous_file is None or any(
+                previous_file.get(key) != file[key] for key in ("url", "md5", "updatedAt")
+            ):
+                return False
+            try:
+                return os.path.getsize(os.path.join(dest, path)) == previous_file.get("size")
+            except OSError:
+                return False
+
+        def download(path: str, url: str, md5: Optional[str]) -> None:
+            file_path = os.path.join(dest, path)
+            if not self.file_client.download_file(
+                url, file_path, concurrency=concurrency, md5=md5
+            ):
+                raise Exception(f"Download of {url.split('?')[0]} failed")
+            manifest["files"][path]["size"] = os.path.getsize(file_path)
+
+        result: DownloadPlaylistResult = {
+            "manifest_path": manifest_path,
+            "downloaded": 0,
+            "skipped": 0,
+            "failed": [],
+        }
+        pending = []
+        for path, url, md5 in downloads:
+            if is_up_to_date(path):
+                manifest["files"][path]["size"] = previous_files[path]["size"]
+                result["skipped"] += 1
+            else:
+                pending.append((path, url, md5))
+
+        self.file_client.storage.reserve(jobs * concurrency)
+        failed_paths: Set[str] = set()
+        try:
+            with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+                futures = [
+                    (path, url, executor.submit(download, path, url, md5))
+                    for path, url, md5 in pending
+                ]
+                for path, url, future in futures:
+                    try:
+                        future.result()
+                        result["downloaded"] += 1
+                    except Exception as e:
+                        failure: DownloadPlaylistFailure = {
+                            "path": path,
+                            "url": url.split("?")[0],
+                            "error": str(e),
+                        }
+                        result["failed"].append(failure)
+                        failed_paths.add(path)
+        finally:
+            # failed media stay out of the manifest, so the next run downloads them
+            for path in failed_paths:
+                del manifest["files"][path]
+            for entry in manifest["dreams"].values():
+                for name in ("video", "thumbnail"):
+                    if entry[name] in failed_paths:
+                        entry[name] = None
+                entry["filmstrip"] = [path for path in entry["filmstrip"] if path not in failed_paths]
+            save_playlist_manifest(manifest_path, manifest)
+        return result
+
     def update_playlist(self, uuid: str, data: UpdatePlaylistRequest) -> Playlist:
         """
         Updates a playlist by its uuid
@@ -108,6 +575,228 @@ class PlaylistClient:
         playlistItem = response_data["playlistItem"]
         return playlistItem
 
+    def _call_rate_limited(self, controller: AimdController, function, *args) -> Any:
+        """
+        Calls the api within a concurrency limit. Rate limited calls (429 or 503) halve
+        the limit and are retried after the delay the server asks for
+        Args:
+            controller (AimdController): concurrency limit shared by the calls
+            function (Callable): api call
+        Returns:
+            Any: api call result
+        """
+        attempt = 0
+        while True:
+            controller.acquire()
+            started_at = time.monotonic()
+            try:
+                result = function(*args)
+                controller.record_success(1, time.monotonic() - started_at)
+                return result
+            except requests.exceptions.HTTPError as e:
+                response = e.response
+                if (
+                    response is None
+                    or response.status_code not in (429, 503)
+                    or attempt >= RATE_LIMIT_MAX_RETRIES
+                ):
+                    raise
+                controller.record_failure()
+                delay = get_retry_after(response.headers)
+                if delay is None:
+                    delay = min(RATE_LIMIT_BACKOFF * 2**attempt, RATE_LIMIT_MAX_DELAY)
+            finally:
+                controller.release()
+            attempt += 1
+            print(f"Rate limited, retrying in {delay:.1f}s, attempt {attempt + 1}.")
+            time.sleep(delay)
+
+    def add_items_to_playlist(
+        self,
+        playlist_uuid: str,
+        items: List[Union[str, Tuple[PlaylistItemType, str]]],
+        jobs: int = DEFAULT_PLAYLIST_ITEM_JOBS,
+        reorder: bool = True,
+    ) -> List[PlaylistItemResult]:
+        """
+        Adds many items to a playlist concurrently, then reorders the added items once
+        so they follow the given order after the existing ones
+        Args:
+            playlist_uuid (str): playlist uuid
+            items (List[Union[str, Tuple[PlaylistItemType, str]]]): dream uuids, or
+                (type, uuid) pairs to add dreams and playlists
+            jobs (int): maximum requests at once, lowered while rate limited
+            reorder (bool): reorder the added items, else they stay in completion order
+        Returns:
+            List[PlaylistItemResult]: results in the given order, failed additions have success False
+        """
+        items = normalize_playlist_items(items)
+        controller = AimdController(jobs, jobs)
+        results: List[PlaylistItemResult] = [
+            {"uuid": item_uuid, "id": None, "success": False} for _, item_uuid in items
+        ]
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+            futures = [
+                executor.submit(
+                    self._call_rate_limited,
+                    controller,
+                    self.add_item_to_playlist,
+                    playlist_uuid,
+                    item_type,
+                    item_uuid,
+                )
+                for item_type, item_uuid in items
+            ]
+            for result, future in zip(results, futures):
+                try:
+                    playlist_item = future.result()
+                    result["playlistItem"] = playlist_item
+                    result["id"] = playlist_item["id"]
+                    result["success"] = True
+                except Exception as e:
+                    result["error"] = str(e)
+
+        # concurrent additions are appended in completion order
+        added = [result["playlistItem"] for result in results if result["success"]]
+        if reorder and len(added) > 1:
+            first = min(item.get("order") or 0 for item in added)
+            order = [{"id": item["id"], "order": first + index} for index, item in enumerate(added)]
+            try:
+                self._call_rate_limited(controller, self.reorder_playlist, playlist_uuid, order)
+                for item, entry in zip(added, order):
+                    item["order"] = entry["order"]
+            except Exception as e:
+                for result in results:
+                    if result["success"]:
+                        result["error"] = f"Added but not reordered: {e}"
+        return results
+
+    def sync_playlist(
+        self,
+        uuid: str,
+        desired_items: List[Union[str, Tuple[PlaylistItemType, str]]],
+        jobs: int = DEFAULT_PLAYLIST_ITEM_JOBS,
+    ) -> PlaylistSyncResult:
+        """
+        Makes a playlist hold exactly the given items in the given order, with as few
+        changes as possible: items already there are kept, only missing ones are added
+        and extra ones removed, and a single reorder moves only the items whose order
+        has to change
+        Args:
+            uuid (str): playlist uuid
+            desired_items (List[Union[str, Tuple[PlaylistItemType, str]]]): dream uuids,
+                or (type, uuid) pairs for dreams and playlists, in play order
+            jobs (int): maximum requests at once, lowered while rate limited
+        Returns:
+            PlaylistSyncResult: per item results of additions and removals, and move counts
+        """
+        desired = [
+            (item_type.value, item_uuid)
+            for item_type, item_uuid in normalize_playlist_items(desired_items)
+        ]
+        current = get_sorted_playlist_items(
+            {"items": fetch_all_pages(partial(self._get_playlist_items_page, uuid))}
+        )
+        matched, removed = match_playlist_items(current, desired)
+
+        result: PlaylistSyncResult = {
+            "added": [],
+            "removed": [],
+            "moved": 0,
+            "unchanged": 0,
+            "success": True,
+        }
+        if removed:
+            result["removed"] = self.remove_items_from_playlist(
+                uuid, [item["id"] for item in removed], jobs=jobs
+            )
+        missing = [
+            (PlaylistItemType(item_type), item_uuid)
+            for (item_type, item_uuid), item in zip(desired, matched)
+            if item is None
+        ]
+        if missing:
+            result["added"] = self.add_items_to_playlist(
+                uuid, missing, jobs=jobs, reorder=False
+            )
+
+        # failed additions are left out of the sequence
+        added = iter(result["added"])
+        sequence = []
+        for item in matched:
+            if item is None:
+                added_result = next(added)
+                if not added_result["success"]:
+                    continue
+                item = added_result["playlistItem"]
+            sequence.append(item)
+
+        targets = plan_playlist_order([item.get("order") for item in sequence])
+        order = [
+            {"id": item["id"], "order": target}
+            for item, target in zip(sequence, targets)
+            if item.get("order") != target
+        ]
+        result["moved"] = len(order)
+        result["unchanged"] = len(sequence) - len(order)
+        result["success"] = all(
+            item_result["success"] for item_result in result["added"] + result["removed"]
+        )
+        if order:
+            try:
+                self._call_rate_limited(
+                    AimdController(1, 1), self.reorder_playlist, uuid, order
+                )
+                for item, target in zip(sequence, targets):
+                    item["order"] = target
+            except Exception as e:
+                print(f"Playlist {uuid} not reordered: {e}")
+                result["success"] = False
+        return result
+
+    def remove_items_from_playlist(
+        self,
+        playlist_uuid: str,
+        playlist_item_ids: List[int],
+        jobs: int = DEFAULT_PLAYLIST_ITEM_JOBS,
+    ) -> List[PlaylistItemResult]:
+        """
+        Removes many items from a playlist concurrently, the remaining items keep their order
+        Args:
+            playlist_uuid (str): playlist uuid
+            playlist_item_ids (List[int]): playlist item ids
+            jobs (int): maximum requests at once, lowered while rate limited
+        Returns:
+            List[PlaylistItemResult]: results in the given order, failed removals have success False
+        """
+        controller = AimdController(jobs, jobs)
+        results: List[PlaylistItemResult] = []
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+            futures = [
+                executor.submit(
+                    self._call_rate_limited,
+                    controller,
+                    self.delete_item_from_playlist,
+                    playlist_uuid,
+                    playlist_item_id,
+                )
+                for playlist_item_id in playlist_item_ids
+            ]
+            for playlist_item_id, future in zip(playlist_item_ids, futures):
+                result: PlaylistItemResult = {
+                    "uuid": None,
+                    "id": playlist_item_id,
+                    "success": False,
+                }
+                try:
+                    result["success"] = bool(future.result())
+                    if not result["success"]:
+                        result["error"] = "Item not removed"
+                except Exception as e:
+                    result["error"] = str(e)
+                results.append(result)
+        return results
+
     def add_file_to_playlist(
         self, 
         uuid: str, 
@@ -145,6 +834,59 @@ class PlaylistClient:
         )
         return dream
 
+    def add_files_to_playlist(
+        self,
+        uuid: str,
+        paths: Union[str, List[str]],
+        options: Optional[UploadFileOptions] = None,
+        jobs: int = DEFAULT_UPLOAD_JOBS,
+        max_parts_in_flight: Optional[int] = None,
+        memory_budget: int = DEFAULT_UPLOAD_MEMORY_BUDGET,
+        item_jobs: int = DEFAULT_PLAYLIST_ITEM_JOBS,
+    ) -> List[AddFileToPlaylistResult]:
+        """
+        Uploads many files concurrently creating dreams, then adds them to a playlist in
+        one concurrent batch, reordered once to follow the given order
+        Args:
+            uuid (str): playlist uuid
+            paths (Union[str, List[str]]): directory, file path, or list of them
+            options (Optional[UploadFileOptions]): upload options shared by every file
+            jobs (int): number of files uploaded at once
+            max_parts_in_flight (Optional[int]): parts in flight across all files
+            memory_budget (int): bytes of parts held by read-ahead (options["read_ahead"])
+                across all files, only read-ahead buffers reserve it, parts streamed
+                from disk aren't counted
+            item_jobs (int): maximum playlist additions at once, lowered while rate limited
+        Returns:
+            List[AddFileToPlaylistResult]: results, failed uploads or additions have success False
+        """
+        results: List[AddFileToPlaylistResult] = self.file_client.upload_many(
+            paths,
+            type=DreamFileType.DREAM,
+            options=options,
+            jobs=jobs,
+            max_parts_in_flight=max_parts_in_flight,
+            memory_budget=memory_budget,
+        )
+        # items are added once every upload finished, so playlist order follows the given paths
+        uploaded = [result for result in results if result["success"]]
+        if not uploaded:
+            return results
+        item_results = self.add_items_to_playlist(
+            uuid,
+            [(PlaylistItemType.DREAM, result["result"]["uuid"]) for result in uploaded],
+            jobs=item_jobs,
+        )
+        for result, item_result in zip(uploaded, item_results):
+            if not item_result["success"]:
+                result["success"] = False
+                result["error"] = f"Uploaded but not added to playlist: {item_result['error']}"
+                continue
+            result["playlistItem"] = item_result["playlistItem"]
+            if item_result.get("error"):
+                result["error"] = item_result["error"]
+        return results
+
     def delete_item_from_playlist(
         self,
         uuid: str,
@@ -262,6 +1004,29 @@ class PlaylistClient:
         data: PlaylistItemsResponseWrapper = response["data"]
         return data
 
+    def _get_playlist_items_page(
+        self, uuid: str, take: int, skip: int
+    ) -> Tuple[List[PlaylistItem], int]:
+        page = self.get_playlist_items(uuid, take=take, skip=skip)
+        return page["items"], page["totalCount"]
+
+    def iter_playlist_items(
+        self, uuid: str, page_size: int = MAX_PAGE_SIZE, prefetch: bool = True
+    ) -> Iterator[PlaylistItem]:
+        """
+        Iterates over the items of a playlist, fetching pages on demand with the next
+        one fetched in the background
+        Args:
+            uuid (str): playlist uuid
+            page_size (int): items requested per page (max 100)
+            prefetch (bool): fetch the next page while the current one is consumed
+        Returns:
+            Iterator[PlaylistItem]: playlist items in order
+        """
+        return iter_pages(
+            partial(self._get_playlist_items_page, uuid), page_size, prefetch=prefetch
+        )
+
     def get_playlist_keyframes(
         self, uuid: str, take: Optional[int] = None, skip: Optional[int] = None
     ) -> PlaylistKeyframesResponseWrapper:
@@ -284,6 +1049,29 @@ class PlaylistClient:
         data: PlaylistKeyframesResponseWrapper = response["data"]
         return data
 
+    def _get_playlist_keyframes_page(
+        self, uuid: str, take: int, skip: int
+    ) -> Tuple[List[PlaylistKeyframe], int]:
+        page = self.get_playlist_keyframes(uuid, take=take, skip=skip)
+        return page["keyframes"], page["totalCount"]
+
+    def iter_playlist_keyframes(
+        self, uuid: str, page_size: int = MAX_PAGE_SIZE, prefetch: bool = True
+    ) -> Iterator[PlaylistKeyframe]:
+        """
+        Iterates over the keyframes of a playlist, fetching pages on demand with the
+        next one fetched in the background
+        Args:
+            uuid (str): playlist uuid
+            page_size (int): keyframes requested per page (max 100)
+            prefetch (bool): fetch the next page while the current one is consumed
+        Returns:
+            Iterator[PlaylistKeyframe]: playlist keyframes in order
+        """
+        return iter_pages(
+            partial(self._get_playlist_keyframes_page, uuid), page_size, prefetch=prefetch
+        )
+
     def delete_playlist(self, uuid: str) -> Optional[bool]:
         """
         Deletes a playlist
@@ -0,0 +1,64 @@
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any
+from ..client.api_client import EDREAM_USER_AGENT
+
+# connections kept alive per storage host, opened as needed
+DEFAULT_STORAGE_POOL_SIZE = 64
+# storage hosts whose connections are kept alive
+STORAGE_POOL_HOSTS = 10
+
+
+class StorageTransport:
+    """
+    A pooled HTTP transport for presigned storage urls (uploads and downloads).
+    Connections are kept alive per storage host and reused across parts and
+    files. It is separate from the ApiClient session so the api key is never
+    sent to storage, and it can be shared between threads
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_STORAGE_POOL_SIZE):
+        self.pool_size = pool_size
+        self._warned = False
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Connection": "keep-alive",
+                "User-Agent": EDREAM_USER_AGENT,
+            }
+        )
+        # mounted once: replacing the adapter of a session in use would leak the
+        # connections pooled by the old one
+        adapter = HTTPAdapter(
+            pool_connections=STORAGE_POOL_HOSTS,
+            pool_maxsize=pool_size,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def reserve(self, concurrency: int) -> None:
+        """
+        Checks that the connection pool can keep `concurrency` connections to the
+        same host alive. Requests beyond the pool size still run, on connections
+        opened and discarded
+        Args:
+            concurrency (int): number of concurrent requests expected per host
+        """
+        if concurrency > self.pool_size and not self._warned:
+            self._warned = True
+            print(
+                f"Warning: {concurrency} concurrent storage requests exceed the connection "
+                f"pool size {self.pool_size}, extra connections won't be reused."
+            )
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.session.put(url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.session.get(url, **kwargs)
+
+    def head(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.session.head(url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
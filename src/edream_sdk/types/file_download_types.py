@@ -0,0 +1,52 @@
+from typing import Optional, List, Dict, TypedDict
+
+
+# Download journal state mapping, persisted next to a `.part` file to resume a download
+class DownloadJournalState(TypedDict):
+    version: int
+    url: str  # source url without query, presigned urls change between requests
+    etag: Optional[str]
+    lastModified: Optional[str]
+    size: Optional[int]  # None if unknown
+    segmentSize: Optional[int]  # None for single stream downloads, which resume from the file length
+    ranges: List[List[int]]  # completed [first byte, last byte] ranges of segmented downloads
+
+
+# Playlist export manifest file mapping, one per downloaded media
+class PlaylistManifestFile(TypedDict):
+    url: str  # source url without query
+    md5: Optional[str]  # known for dream videos only
+    updatedAt: Optional[str]  # updated_at of the dream the media belongs to
+    size: int
+
+
+# Playlist export manifest dream mapping, paths relative to the export directory
+class PlaylistManifestDream(TypedDict):
+    name: Optional[str]
+    video: Optional[str]
+    thumbnail: Optional[str]
+    filmstrip: List[str]
+
+
+# Playlist export manifest mapping, written to `manifest.json` in the export directory
+class PlaylistManifest(TypedDict):
+    version: int
+    playlist: str
+    order: List[str]  # dream uuids in play order
+    dreams: Dict[str, PlaylistManifestDream]
+    files: Dict[str, PlaylistManifestFile]  # relative path -> file
+
+
+# Playlist export failure mapping, one per media not downloaded
+class DownloadPlaylistFailure(TypedDict):
+    path: str
+    url: str
+    error: str
+
+
+# Playlist export result mapping
+class DownloadPlaylistResult(TypedDict):
+    manifest_path: str
+    downloaded: int  # media downloaded by this run
+    skipped: int  # media already up to date
+    failed: List[DownloadPlaylistFailure]
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, List, TypedDict, Callable
+from typing import Optional, List, Dict, TypedDict, Callable
 from .dream_types import Dream, DreamFileType, DreamMediaType
 
 
@@ -78,7 +78,8 @@ class CompleteMultipartUploadFormValues(TypedDict):
     processed: Optional[bool] = None
 
 
-ProgressCallback = Callable[[int, int, float], None]
+# (uploaded bytes, total bytes, percentage), total and percentage are None for streams of unknown size
+ProgressCallback = Callable[[int, Optional[int], Optional[float]], None]
 
 
 # Upload file options mapping
@@ -91,6 +92,17 @@ class UploadFileOptions(TypedDict):
     mediaType: Optional[DreamMediaType] = None  # Specific to DREAM - VIDEO or IMAGE
     progress_callback: Optional[ProgressCallback] = None  # Optional progress callback
     progress_interval: Optional[float] = None  # Interval in seconds between progress updates (default 1.0)
+    concurrency: Optional[int] = None  # Number of parts uploaded in parallel (default 1)
+    adaptive_concurrency: Optional[bool] = None  # Adapt parts in parallel to measured throughput, starting at concurrency
+    max_concurrency: Optional[int] = None  # Upper bound for adaptive concurrency (default 16)
+    part_size: Optional[int] = None  # Part size in bytes (default chosen from file size and concurrency)
+    read_ahead: Optional[int] = None  # Number of parts read ahead in the background while uploading (default 0)
+    md5: Optional[bool] = None  # Compute the file md5 while uploading, returned in UploadResult
+    content_md5: Optional[bool] = None  # Send a Content-MD5 header with every part
+    dedup: Optional[bool] = None  # Reuse the dream created by an identical file instead of uploading (DREAM only)
+    dedup_index: Optional[str] = None  # Dedup index path (default ~/.cache/edream_sdk/dedup.sqlite3)
+    resumable: Optional[bool] = None  # Journal completed parts on disk to resume an interrupted upload
+    journal_dir: Optional[str] = None  # Directory for upload journals (default ~/.cache/edream_sdk/uploads)
 
 
 # Refresh multipart upload mapping
@@ -100,6 +112,41 @@ class RefreshMultipartUpload(TypedDict):
     uploadId: str
 
 
+# Upload journal state mapping, persisted to resume interrupted uploads
+class UploadJournalState(TypedDict):
+    version: int
+    uploadId: str
+    uuid: Optional[str]
+    type: str
+    partSize: int
+    totalParts: int
+    fileSize: int
+    fileMtimeNs: int
+    parts: Dict[int, str]  # part number -> etag
+
+
+# Upload result mapping
+class UploadResult(TypedDict):
+    dream: Optional[Dream]  # None for KEYFRAME uploads
+    uuid: Optional[str]
+    upload_id: Optional[str]  # None when the upload was skipped
+    file_size: int
+    part_size: int
+    total_parts: int
+    md5: Optional[str]  # hex digest of the whole file, when requested
+    deduplicated: bool  # True if an identical file was uploaded before and its dream is returned
+    concurrency: int  # parts in parallel when the upload finished, as chosen by adaptive concurrency
+    throughput: float  # measured upload throughput in bytes per second
+
+
+# Upload many files result mapping, one per file
+class UploadManyResult(TypedDict):
+    file_path: str
+    success: bool
+    result: Optional[UploadResult] = None
+    error: Optional[str] = None
+
+
 # Complete file response wrapper mapping
 class CompleteFileResponseWrapper(TypedDict):
     dream: Optional[Dream]
@@ -1,9 +1,10 @@
 from enum import Enum
-from typing import List, Optional, TypedDict
+from typing import List, Optional, Dict, TypedDict
 from dataclasses import dataclass
 from .user_types import User
 from .dream_types import Dream
 from .keyframe_types import Keyframe
+from .file_upload_types import UploadManyResult
 
 
 # Enum for DreamStatusType
@@ -108,3 +109,35 @@ class PlaylistItemsResponseWrapper(TypedDict):
 class PlaylistKeyframesResponseWrapper(TypedDict):
     keyframes: List[PlaylistKeyframe]
     totalCount: int
+
+
+# Resolved playlist tree mapping, nested playlists are fetched once however often they appear
+class PlaylistTree(TypedDict):
+    root: str  # root playlist uuid
+    playlists: Dict[str, Playlist]  # playlists by uuid, with their items
+    children: Dict[str, List[str]]  # nested playlist uuids of each playlist, in order
+    dreams: List[Dream]  # dreams in play order, nested playlists expanded in place
+    cycles: List[List[str]]  # [playlist, nested playlist] links skipped as the nested one contains the first
+
+
+# Add files to playlist result mapping, one per file
+class AddFileToPlaylistResult(UploadManyResult):
+    playlistItem: Optional[PlaylistItem] = None
+
+
+# Bulk playlist item change result mapping, one per added or removed item
+class PlaylistItemResult(TypedDict):
+    uuid: Optional[str]  # uuid of the added dream or playlist
+    id: Optional[int]  # playlist item id
+    success: bool
+    playlistItem: Optional[PlaylistItem] = None
+    error: Optional[str] = None
+
+
+# Playlist sync result mapping
+class PlaylistSyncResult(TypedDict):
+    added: List[PlaylistItemResult]
+    removed: List[PlaylistItemResult]
+    moved: int  # items given a new order, added items included
+    unchanged: int  # kept items left at their order
+    success: bool  # every addition, removal and the reorder succeeded
@@ -0,0 +1,311 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from typing import Optional, Iterator, Dict
+from .download_utils import strip_url_query
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows, locks are per process only
+    fcntl = None
+
+DEFAULT_MEDIA_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "edream_sdk", "media"
+)
+DEFAULT_MEDIA_CACHE_SIZE = 10 * 1024 * 1024 * 1024
+MEDIA_CACHE_TIMEOUT = 30.0
+
+
+class MediaCache:
+    """
+    On-disk media cache with a byte budget and least recently used eviction.
+    Files are content-addressed by md5 when it is known, so the same media behind
+    different urls is stored once, and by url path otherwise (presigned url queries
+    are ignored). A SQLite index and per-object file locks make it safe to share
+    between threads and processes of one host
+    """
+
+    # thread locks by lock file path, shared by every instance on the same directory
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _thread_locks_lock = threading.Lock()
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_MEDIA_CACHE_SIZE,
+    ):
+        self.directory = directory or DEFAULT_MEDIA_CACHE_DIR
+        self.max_bytes = max_bytes
+        # keys not evicted by this instance, with the number of times they are pinned
+        self._pinned: Dict[str, int] = {}
+        self._pinned_lock = threading.Lock()
+        self.index_path = os.path.join(self.directory, "index.sqlite3")
+        for name in ("objects", "tmp", "locks"):
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, "
+                "md5 TEXT, verified INTEGER NOT NULL DEFAULT 0, last_access REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, key TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.index_path, timeout=MEDIA_CACHE_TIMEOUT)
+        try:
+            # commits on success, rolls back on error
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_key(self, url: str, md5: Optional[str] = None) -> str:
+        """
+        Returns the cache key of a media
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        Returns:
+            str: cache key
+        """
+        if md5:
+            return f"md5-{md5.lower()}"
+        return "url-" + hashlib.sha256(strip_url_query(url).encode("utf-8")).hexdigest()
+
+    def get_temp_path(self, url: str, md5: Optional[str] = None) -> str:
+        """
+        Returns the path to download a media to before adding it, stable for a key
+        so an interrupted download can continue. Use it while holding `lock`
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        Returns:
+            str: temporary file path, in the cache file system
+        """
+        extension = os.path.splitext(urlparse(url).path)[1]
+        return os.path.join(self.directory, "tmp", self.get_key(url, md5) + extension)
+
+    @contextmanager
+    def lock(self, url: str, md5: Optional[str] = None) -> Iterator[None]:
+        """
+        Holds the exclusive lock of a media, across threads and processes, so
+        concurrent misses download it once
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        """
+        lock_path = os.path.abspath(
+            os.path.join(self.directory, "locks", self.get_key(url, md5))
+        )
+        with MediaCache._thread_locks_lock:
+            thread_lock = MediaCache._thread_locks.setdefault(lock_path, threading.Lock())
+        # flock alone doesn't exclude threads sharing a lock file descriptor
+        with thread_lock:
+            with open(lock_path, "a+b") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def get(self, url: str, md5: Optional[str] = None) -> Optional[str]:
+        """
+        Looks a media up, by md5 if given, else by url, marking it as recently used
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        Returns:
+            Optional[str]: cached file path, None on a miss
+        """
+        with self._connect() as connection:
+            if md5:
+                key = self.get_key(url, md5)
+            else:
+                row = connection.execute(
+                    "SELECT key FROM urls WHERE url = ?", (strip_url_query(url),)
+                ).fetchone()
+                key = row[0] if row else self.get_key(url)
+            row = connection.execute(
+                "SELECT path, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            path = os.path.join(self.directory, row[0])
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = None
+            if size != row[1]:
+                # removed or changed behind the cache
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            connection.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return path
+
+    def pin(self, url: str, md5: Optional[str] = None) -> None:
+        """
+        Keeps a media from being evicted by this cache instance until it is unpinned,
+        such as media about to be played. Pinned media may exceed the byte budget
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        """
+        key = self.get_key(url, md5)
+        with self._pinned_lock:
+            self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, url: str, md5: Optional[str] = None) -> None:
+        """
+        Lets a pinned media be evicted again, once unpinned as many times as pinned
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        """
+        key = self.get_key(url, md5)
+        with self._pinned_lock:
+            count = self._pinned.get(key, 0) - 1
+            if count > 0:
+                self._pinned[key] = count
+            else:
+                self._pinned.pop(key, None)
+
+    def is_verified(self, url: str, md5: Optional[str] = None) -> bool:
+        """
+        Tells whether a cached media content was checked against its md5
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        Returns:
+            bool: True if the cached file is known to match its md5
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT verified FROM entries WHERE key = ?", (self.get_key(url, md5),)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def mark_verified(self, url: str, md5: str) -> None:
+        """
+        Records that a cached media was checked against its md5
+        Args:
+            url (str): media url
+            md5 (str): media md5 hex digest
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE entries SET verified = 1 WHERE key = ?", (self.get_key(url, md5),)
+            )
+
+    def remove(self, url: str, md5: Optional[str] = None) -> None:
+        """
+        Removes a media from the cache
+        Args:
+            url (str): media url
+            md5 (Optional[str]): media md5 hex digest, if known
+        """
+        key = self.get_key(url, md5)
+        with self._connect() as connection:
+            row = connection.execute("SELECT path FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                try:
+                    os.remove(os.path.join(self.directory, row[0]))
+                except FileNotFoundError:
+                    pass
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            connection.execute("DELETE FROM urls WHERE key = ?", (key,))
+
+    def put(
+        self,
+        url: str,
+        file_path: str,
+        md5: Optional[str] = None,
+        verified: bool = False,
+    ) -> str:
+        """
+        Moves a downloaded file into the cache, then evicts least recently used
+        media over the byte budget
+        Args:
+            url (str): media url
+            file_path (str): downloaded file, on the cache file system
+            md5 (Optional[str]): media md5 hex digest, if known
+            verified (bool): the file was checked against md5
+        Returns:
+            str: cached file path
+        """
+        key = self.get_key(url, md5)
+        extension = os.path.splitext(urlparse(url).path)[1]
+        relative_path = os.path.join("objects", key[-2:], key + extension)
+        path = os.path.join(self.directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(file_path)
+        os.replace(file_path, path)
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, path, size, md5, verified, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, relative_path, size, md5, int(verified), time.time()),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO urls (url, key) VALUES (?, ?)",
+                (strip_url_query(url), key),
+            )
+        self.evict(keep=key)
+        return path
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Removes least recently used media until the cache fits its byte budget,
+        except pinned media
+        Args:
+            keep (Optional[str]): key never evicted, such as the media just added
+        Returns:
+            int: number of removed media
+        """
+        with self._pinned_lock:
+            kept = set(self._pinned)
+        if keep is not None:
+            kept.add(keep)
+        removed = 0
+        with self._connect() as connection:
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            rows = connection.execute(
+                "SELECT key, path, size FROM entries ORDER BY last_access"
+            ).fetchall()
+            for key, relative_path, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if key in kept:
+                    continue
+                try:
+                    os.remove(os.path.join(self.directory, relative_path))
+                except FileNotFoundError:
+                    pass
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                connection.execute("DELETE FROM urls WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        return removed
+
+    def size(self) -> int:
+        """
+        Returns the bytes held by the cache
+        """
+        with self._connect() as connection:
+            return connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
@@ -0,0 +1,172 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional, Mapping
+
+# growth needed over the previous window to add a transfer
+AIMD_THROUGHPUT_GAIN = 0.05
+# latency per byte, relative to the best seen, that halves the limit
+AIMD_LATENCY_TOLERANCE = 2.0
+
+
+class ByteBudget:
+    """
+    Counting semaphore over bytes, caps the memory held by buffered parts
+    across every upload sharing it
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Budget capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.available = capacity
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> int:
+        """
+        Waits until `size` bytes are available and reserves them. A request larger
+        than the whole budget reserves all of it, so it can't wait forever
+        Args:
+            size (int): bytes to reserve
+        Returns:
+            int: reserved bytes, to be given back with release
+        """
+        size = min(size, self.capacity)
+        with self._condition:
+            self._condition.wait_for(lambda: self.available >= size)
+            self.available -= size
+        return size
+
+    def release(self, size: int) -> None:
+        """
+        Gives back reserved bytes
+        Args:
+            size (int): bytes to release
+        """
+        with self._condition:
+            self.available += size
+            self._condition.notify_all()
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit of concurrent transfers.
+    After every window of `limit` completions the limit grows by one if throughput
+    improved, and it is halved, at most once per window, on errors or when latency
+    per byte rises well above the best seen. With min_limit == max_limit it is a
+    plain fixed limit that still measures throughput
+    """
+
+    def __init__(self, initial: int, max_limit: int, min_limit: int = 1):
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self.bytes = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._best_latency: Optional[float] = None
+        self._last_throughput = 0.0
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        self._window_started_at = time.monotonic()
+        self._window_bytes = 0
+        self._window_seconds = 0.0
+        self._window_count = 0
+        self._window_decreased = False
+
+    def acquire(self) -> None:
+        """
+        Waits until a transfer can start
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+                self._reset_window()
+
+    def release(self) -> None:
+        """
+        Marks a transfer as finished, successful or not
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, size: int, seconds: float) -> None:
+        """
+        Records a completed transfer and adjusts the limit at the end of a window
+        Args:
+            size (int): transferred bytes
+            seconds (float): transfer duration
+        """
+        with self._condition:
+            self.bytes += size
+            self.finished_at = time.monotonic()
+            self._window_bytes += size
+            self._window_seconds += seconds
+            self._window_count += 1
+            if self._window_count < self.limit:
+                return
+
+            latency = self._window_seconds / max(self._window_bytes, 1)
+            elapsed = max(self.finished_at - self._window_started_at, 1e-6)
+            throughput = self._window_bytes / elapsed
+            if self._best_latency is None or latency < self._best_latency:
+                self._best_latency = latency
+
+            if latency > self._best_latency * AIMD_LATENCY_TOLERANCE:
+                self._decrease()
+            elif throughput > self._last_throughput * (1 + AIMD_THROUGHPUT_GAIN):
+                self.limit = min(self.limit + 1, self.max_limit)
+                self._condition.notify_all()
+            self._last_throughput = throughput
+            self._reset_window()
+
+    def record_failure(self) -> None:
+        """
+        Records a failed transfer attempt, halving the limit
+        """
+        with self._condition:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        if self._window_decreased:
+            return
+        self.limit = max(self.limit // 2, self.min_limit)
+        self._window_decreased = True
+
+    @property
+    def throughput(self) -> float:
+        """
+        Measured throughput in bytes per second since the first transfer started
+        """
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.bytes / max(self.finished_at - self.started_at, 1e-6)
+
+
+def get_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Returns the delay asked by a Retry-After response header, sent with rate limited
+    (429) or unavailable (503) responses
+    Args:
+        headers (Mapping[str, str]): response headers
+    Returns:
+        Optional[float]: delay in seconds, None if the header is missing or invalid
+    """
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        # HTTP date
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+from typing import Optional, Iterator
+
+DEFAULT_DEDUP_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "edream_sdk", "dedup.sqlite3"
+)
+DEDUP_INDEX_TIMEOUT = 30.0
+
+
+class DedupIndex:
+    """
+    Local SQLite index of uploaded file contents, mapping md5 and size to the
+    resource uuid created for them. It also caches file md5s by path, size and
+    modification time, so unchanged files are not hashed again. A connection is
+    opened per operation, so one index can be used from several threads and processes
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DEFAULT_DEDUP_INDEX_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, md5 TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "md5 TEXT NOT NULL, size INTEGER NOT NULL, type TEXT NOT NULL, "
+                "uuid TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (md5, size, type))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS uploads_size ON uploads (size, type)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=DEDUP_INDEX_TIMEOUT)
+        try:
+            # commits on success, rolls back on error
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_file_md5(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        Returns the cached md5 of a file, if it didn't change since it was hashed
+        Args:
+            path (str): file path
+            size (int): file size
+            mtime_ns (int): file modification time
+        Returns:
+            Optional[str]: md5 hex digest
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT md5 FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (os.path.abspath(path), size, mtime_ns),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_file_md5(self, path: str, size: int, mtime_ns: int, md5: str) -> None:
+        """
+        Caches the md5 of a file
+        Args:
+            path (str): file path
+            size (int): file size
+            mtime_ns (int): file modification time
+            md5 (str): md5 hex digest
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, md5) VALUES (?, ?, ?, ?)",
+                (os.path.abspath(path), size, mtime_ns, md5),
+            )
+
+    def has_size(self, size: int, type: str) -> bool:
+        """
+        Tells whether any upload of the same size exists, a file can't be a duplicate otherwise
+        Args:
+            size (int): file size
+            type (str): file type
+        Returns:
+            bool: True if an upload of that size is indexed
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT 1 FROM uploads WHERE size = ? AND type = ? LIMIT 1",
+                (size, type),
+            ).fetchone()
+        return row is not None
+
+    def find(self, md5: str, size: int, type: str) -> Optional[str]:
+        """
+        Finds the uuid of the resource created for a file content
+        Args:
+            md5 (str): md5 hex digest
+            size (int): file size
+            type (str): file type
+        Returns:
+            Optional[str]: resource uuid
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT uuid FROM uploads WHERE md5 = ? AND size = ? AND type = ?",
+                (md5, size, type),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, md5: str, size: int, type: str, uuid: str) -> None:
+        """
+        Records the resource created for a file content
+        Args:
+            md5 (str): md5 hex digest
+            size (int): file size
+            type (str): file type
+            uuid (str): resource uuid
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO uploads (md5, size, type, uuid, created_at) VALUES (?, ?, ?, ?, ?)",
+                (md5, size, type, uuid, time.time()),
+            )
+
+    def forget(self, uuid: str) -> None:
+        """
+        Removes a resource that no longer exists from the index
+        Args:
+            uuid (str): resource uuid
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM uploads WHERE uuid = ?", (uuid,))
@@ -0,0 +1,414 @@
+import io
+import os
+import re
+import json
+import hashlib
+import threading
+from urllib.parse import urlparse
+from typing import Optional, Tuple, Dict, Iterator
+from ..types.file_download_types import DownloadJournalState, PlaylistManifest
+
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)")
+DOWNLOAD_JOURNAL_VERSION = 1
+PLAYLIST_MANIFEST_VERSION = 1
+HASH_READ_SIZE = 1024 * 1024
+
+
+class DownloadVerificationError(ValueError):
+    """
+    Raised when a downloaded file doesn't match its expected md5
+    """
+
+
+def parse_content_range(header: Optional[str]) -> Optional[Tuple[int, int, Optional[int]]]:
+    """
+    Parses a Content-Range response header
+    Args:
+        header (Optional[str]): header value, like "bytes 0-99/1000"
+    Returns:
+        Optional[Tuple[int, int, Optional[int]]]: first byte, last byte (-1 both for an
+            unsatisfied range) and total size (None if unknown), None if the header is
+            missing or invalid
+    """
+    match = CONTENT_RANGE_PATTERN.match(header or "")
+    if not match:
+        return None
+    first, last, total = match.groups()
+    total = None if total == "*" else int(total)
+    if first is None:
+        # unsatisfied range, "bytes */1000"
+        return -1, -1, total
+    return int(first), int(last), total
+
+
+def preallocate_file(file_path: str, size: int) -> None:
+    """
+    Creates a file of `size` bytes to be filled with positional writes, reserving
+    its disk space upfront where supported so a full disk fails early
+    Args:
+        file_path (str): file path
+        size (int): file size
+    """
+    with open(file_path, "wb") as file:
+        if size <= 0:
+            return
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(file.fileno(), 0, size)
+                return
+            except OSError:
+                # not supported by the file system, fall back to a sparse file
+                pass
+        file.truncate(size)
+
+
+def pwrite_all(fd: int, data: bytes, position: int) -> None:
+    """
+    Writes all of `data` at a file position, without moving a shared file offset
+    where positional writes are available
+    Args:
+        fd (int): file descriptor, private to the caller when os.pwrite is missing
+        data (bytes): bytes to write
+        position (int): file position
+    """
+    view = memoryview(data)
+    while len(view):
+        if hasattr(os, "pwrite"):
+            count = os.pwrite(fd, view, position)
+        else:
+            os.lseek(fd, position, os.SEEK_SET)
+            count = os.write(fd, view)
+        view = view[count:]
+        position += count
+
+
+def strip_url_query(url: str) -> str:
+    """
+    Returns a url without query nor fragment, identifying a resource behind
+    presigned or signed cdn urls that change between requests
+    Args:
+        url (str): url
+    Returns:
+        str: url without query
+    """
+    return urlparse(url)._replace(query="", fragment="").geturl()
+
+
+def get_range_validator(etag: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+    """
+    Returns the If-Range validator of a resource: its strong ETag, or its
+    Last-Modified date (weak ETags can't be used with If-Range)
+    Args:
+        etag (Optional[str]): ETag header
+        last_modified (Optional[str]): Last-Modified header
+    Returns:
+        Optional[str]: validator, None if the resource has none
+    """
+    if etag and not etag.startswith("W/"):
+        return etag
+    return last_modified
+
+
+def load_playlist_manifest(path: str) -> Optional[PlaylistManifest]:
+    """
+    Loads a playlist export manifest
+    Args:
+        path (str): manifest path
+    Returns:
+        Optional[PlaylistManifest]: manifest, None if missing, invalid or of another version
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            manifest: PlaylistManifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != PLAYLIST_MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_playlist_manifest(path: str, manifest: PlaylistManifest) -> None:
+    """
+    Writes a playlist export manifest, replacing the previous one at once
+    Args:
+        path (str): manifest path
+        manifest (PlaylistManifest): manifest
+    """
+    manifest["version"] = PLAYLIST_MANIFEST_VERSION
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class DownloadJournal:
+    """
+    Append-only on-disk record of a download in progress, kept next to its `.part`
+    file. The first line holds the source url, its validators and size, every
+    following line a completed byte range. A torn last line is ignored
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self, url: str) -> Optional[DownloadJournalState]:
+        """
+        Loads journal state, if it was written for the same url
+        Args:
+            url (str): source url
+        Returns:
+            Optional[DownloadJournalState]: download state, None if there is nothing to resume
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as journal:
+                lines = journal.read().splitlines()
+        except OSError:
+            return None
+
+        try:
+            state: DownloadJournalState = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return None
+        if (
+            state.get("version") != DOWNLOAD_JOURNAL_VERSION
+            or state.get("url") != strip_url_query(url)
+        ):
+            return None
+
+        ranges = []
+        for line in lines[1:]:
+            try:
+                first, last = json.loads(line)
+                ranges.append([int(first), int(last)])
+            except (ValueError, TypeError):
+                # torn write of the last range, that range is downloaded again
+                continue
+        state["ranges"] = ranges
+        return state
+
+    def start(self, state: DownloadJournalState) -> None:
+        """
+        Starts a new journal, replacing any previous one
+        Args:
+            state (DownloadJournalState): download header
+        """
+        header = {k: v for k, v in state.items() if k != "ranges"}
+        header["version"] = DOWNLOAD_JOURNAL_VERSION
+        header["url"] = strip_url_query(header["url"])
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w", encoding="utf-8") as journal:
+                journal.write(json.dumps(header) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(temp_path, self.path)
+
+    def record_range(self, first: int, last: int) -> None:
+        """
+        Appends a completed byte range to the journal
+        Args:
+            first (int): first byte
+            last (int): last byte
+        """
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as journal:
+                journal.write(json.dumps([first, last]) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def discard(self) -> None:
+        """
+        Removes the journal
+        """
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class OrderedFileHasher:
+    """
+    MD5 of a file written out of order, such as a segmented download, computed
+    while it is written, or of a file read out of order, such as the parts of an
+    upload, computed while it is read. Bytes written at the hashed position are hashed directly,
+    bytes written ahead of it are read back by a background thread once the gap
+    before them is filled, while they are still in the page cache
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.position = 0
+        self._hash = hashlib.md5()
+        # written ranges ahead of the hashed position, start -> end and end -> start
+        self._ahead: Dict[int, int] = {}
+        self._ends: Dict[int, int] = {}
+        self._reading = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._hash_ahead, daemon=True)
+        self._thread.start()
+
+    def update(self, position: int, data: bytes) -> None:
+        """
+        Records bytes written to the file
+        Args:
+            position (int): file position the bytes were written at
+            data (bytes): written bytes
+        """
+        with self._condition:
+            if position == self.position and not self._reading:
+                self._hash.update(data)
+                self.position += len(data)
+                if self.position in self._ahead:
+                    self._condition.notify_all()
+                return
+        self.add_range(position, position + len(data))
+
+    def add_range(self, start: int, end: int) -> None:
+        """
+        Records bytes already in the file, hashed by reading them back
+        Args:
+            start (int): first byte position
+            end (int): position after the last byte
+        """
+        if end <= start:
+            return
+        with self._condition:
+            # merges with adjacent ranges, bytes of a range are written in order
+            if start in self._ends:
+                start = self._ends.pop(start)
+            if end in self._ahead:
+                next_end = self._ahead.pop(end)
+                del self._ends[next_end]
+                end = next_end
+            self._ahead[start] = end
+            self._ends[end] = start
+            self._condition.notify_all()
+
+    def reset(self) -> None:
+        """
+        Starts over, before the file is rewritten from its first byte
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: not self._reading)
+            self._hash = hashlib.md5()
+            self.position = 0
+            self._ahead.clear()
+            self._ends.clear()
+            self._error = None
+
+    def _hash_ahead(self) -> None:
+        fd = None
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._closed or self.position in self._ahead
+                    )
+                    if self.position not in self._ahead:
+                        return
+                    start = self.position
+                    end = self._ahead.pop(start)
+                    del self._ends[end]
+                    self._reading = True
+                if fd is None:
+                    fd = os.open(self.file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+                while start < end:
+                    size = min(HASH_READ_SIZE, end - start)
+                    if hasattr(os, "pread"):
+                        chunk = os.pread(fd, size, start)
+                    else:
+                        os.lseek(fd, start, os.SEEK_SET)
+                        chunk = os.read(fd, size)
+                    if not chunk:
+                        raise EOFError(f"File {self.file_path} is shorter than written")
+                    self._hash.update(chunk)
+                    start += len(chunk)
+                with self._condition:
+                    self.position = end
+                    self._reading = False
+                    self._condition.notify_all()
+        except BaseException as e:
+            with self._condition:
+                self._error = e
+                self._reading = False
+                self._condition.notify_all()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def hexdigest(self, size: int) -> str:
+        """
+        Waits until the bytes written so far are hashed and returns the md5, to be
+        called once every byte is written
+        Args:
+            size (int): file size
+        Returns:
+            str: md5 hex digest
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._error is not None
+                or (not self._reading and self.position not in self._ahead)
+            )
+        self.close()
+        if self._error is not None:
+            raise self._error
+        if self.position != size:
+            raise EOFError(f"Only {self.position} of {size} bytes of {self.file_path} were written")
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        """
+        Stops the background thread
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+class ChunkStream(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks. Chunks are pulled only
+    when read, so a slow reader slows the producer down and at most one chunk is
+    held in memory
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        super().__init__()
+        self._chunks = chunks
+        self._chunk = memoryview(b"")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        while not len(self._chunk):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+        count = min(len(buffer), len(self._chunk))
+        buffer[:count] = self._chunk[:count]
+        self._chunk = self._chunk[count:]
+        self._position += count
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                # releases the connection of a generator stopped early
+                close()
+            self._chunk = memoryview(b"")
+        super().close()
@@ -1,6 +1,32 @@
 import os
+from typing import List
+from .media_utils import ALLOWED_IMAGE_EXTENSIONS, ALLOWED_VIDEO_EXTENSIONS
 
 
 def verify_file_path(file_path: str) -> None:
     if file_path is not None and not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found at path: {file_path}")
+
+
+def list_media_files(directory: str, recursive: bool = False) -> List[str]:
+    """
+    Lists image and video files of a directory, sorted by path
+    Args:
+        directory (str): directory path
+        recursive (bool): include files of subdirectories
+    Returns:
+        List[str]: media file paths
+    """
+    verify_file_path(directory)
+    allowed_extensions = set(ALLOWED_IMAGE_EXTENSIONS + ALLOWED_VIDEO_EXTENSIONS)
+    file_paths = []
+    for root, dirs, files in os.walk(directory):
+        # skip hidden directories
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in files:
+            extension = os.path.splitext(name)[1].lstrip(".").lower()
+            if not name.startswith(".") and extension in allowed_extensions:
+                file_paths.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return sorted(file_paths)
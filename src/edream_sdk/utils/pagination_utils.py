@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, List, Tuple, Iterator, Optional
+from ..types.types import T
+
+# largest take served by paginated endpoints
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_JOBS = 4
+
+# (take, skip) -> (rows, total count), the total count is None if the endpoint doesn't tell it
+PageFetcher = Callable[[int, int], Tuple[List[T], Optional[int]]]
+
+
+def fetch_all_pages(
+    get_page: PageFetcher,
+    page_size: int = MAX_PAGE_SIZE,
+    jobs: int = DEFAULT_PAGE_JOBS,
+) -> List[T]:
+    """
+    Fetches every row of a paginated endpoint. The first page tells the total count
+    and the page size the server actually serves, the other pages are then fetched
+    concurrently and joined in order
+    Args:
+        get_page (PageFetcher): fetches `take` rows after `skip` rows, with the total count
+        page_size (int): rows requested per page
+        jobs (int): pages fetched at once
+    Returns:
+        List[T]: all rows
+    """
+    rows, total = get_page(page_size, 0)
+    rows = list(rows)
+    if total is None:
+        # pages can't be fetched concurrently without knowing how many there are
+        return rows + list(iter_pages(get_page, page_size, skip=len(rows)))
+    if not rows or len(rows) >= total:
+        return rows
+    # the server may cap take below the requested page size
+    page_size = len(rows)
+    skips = range(page_size, total, page_size)
+    with ThreadPoolExecutor(max_workers=max(min(jobs, len(skips)), 1)) as executor:
+        pages = list(executor.map(lambda skip: get_page(page_size, skip)[0], skips))
+    for page in pages:
+        rows.extend(page)
+    return rows
+
+
+def iter_pages(
+    get_page: PageFetcher,
+    page_size: int = MAX_PAGE_SIZE,
+    skip: int = 0,
+    prefetch: bool = True,
+    step: Optional[int] = None,
+) -> Iterator[T]:
+    """
+    Iterates over the rows of a paginated endpoint, fetching pages as they are
+    needed. While a page is consumed the next one is fetched in the background, so
+    at most two pages are held in memory. Stopping early, or closing the iterator,
+    fetches nothing more
+    Args:
+        get_page (PageFetcher): fetches `take` rows after `skip` rows, with the total count
+        page_size (int): rows requested per page
+        skip (int): rows skipped before the first one
+        prefetch (bool): fetch the next page in the background
+        step (Optional[int]): skip added after each page, for endpoints whose rows
+            aren't the paginated ones, the number of rows of the page by default
+    Returns:
+        Iterator[T]: rows in order
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    future: Optional[Future] = None
+    served_size = None
+    try:
+        rows, total = get_page(page_size, skip)
+        while rows:
+            skip += step or len(rows)
+            # the server may cap take below the requested page size
+            served_size = served_size or len(rows)
+            more = skip < total if total is not None else len(rows) >= served_size
+            if more and executor is not None:
+                future = executor.submit(get_page, page_size, skip)
+            yield from rows
+            if not more:
+                return
+            if future is not None:
+                rows, total = future.result()
+                future = None
+            else:
+                rows, total = get_page(page_size, skip)
+    finally:
+        if future is not None:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
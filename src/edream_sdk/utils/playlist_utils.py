@@ -0,0 +1,90 @@
+from bisect import bisect_right
+from collections import defaultdict, deque
+from typing import Optional, List, Tuple, Dict, Deque
+from ..types.playlist_types import PlaylistItem
+
+# (item type, dream or playlist uuid)
+PlaylistItemKey = Tuple[str, str]
+
+
+def get_playlist_item_key(item: PlaylistItem) -> Optional[PlaylistItemKey]:
+    """
+    Returns what a playlist item points to
+    Args:
+        item (PlaylistItem): playlist item
+    Returns:
+        Optional[PlaylistItemKey]: item type and uuid, None if it points to nothing
+    """
+    target = item.get("dreamItem") or item.get("playlistItem")
+    if not target or not target.get("uuid"):
+        return None
+    return item.get("type"), target["uuid"]
+
+
+def match_playlist_items(
+    current: List[PlaylistItem], desired: List[PlaylistItemKey]
+) -> Tuple[List[Optional[PlaylistItem]], List[PlaylistItem]]:
+    """
+    Matches desired playlist entries to current items, so that as many current items
+    as possible are kept. Repeated entries match repeated items in order
+    Args:
+        current (List[PlaylistItem]): current items, in play order
+        desired (List[PlaylistItemKey]): desired entries, in play order
+    Returns:
+        Tuple[List[Optional[PlaylistItem]], List[PlaylistItem]]: for every desired entry
+            the current item it keeps, None if it must be added, and current items to remove
+    """
+    available: Dict[PlaylistItemKey, Deque[PlaylistItem]] = defaultdict(deque)
+    for item in current:
+        available[get_playlist_item_key(item)].append(item)
+    matched = [available[key].popleft() if available.get(key) else None for key in desired]
+    kept_ids = {item["id"] for item in matched if item is not None}
+    removed = [item for item in current if item["id"] not in kept_ids]
+    return matched, removed
+
+
+def plan_playlist_order(orders: List[Optional[int]]) -> List[int]:
+    """
+    Chooses increasing, non negative order values for a sequence of items while
+    keeping the current value of as many items as possible. An item at position p
+    with order o can keep it only if o - p >= 0 and, for every kept item before it,
+    there is room for the items in between, which holds when o - p never decreases
+    along kept items: the kept items are a longest non decreasing subsequence of o - p
+    Args:
+        orders (List[Optional[int]]): current order of each item in the desired
+            sequence, None for items without one
+    Returns:
+        List[int]: order of each item, items kept in place have their current order
+    """
+    # patience sorting: tails[k] is the smallest last o - p of a run of length k + 1
+    tails: List[int] = []
+    tail_positions: List[int] = []
+    previous: Dict[int, Optional[int]] = {}
+    for position, order in enumerate(orders):
+        if order is None or order < position:
+            continue
+        index = bisect_right(tails, order - position)
+        if index == len(tails):
+            tails.append(order - position)
+            tail_positions.append(position)
+        else:
+            tails[index] = order - position
+            tail_positions[index] = position
+        previous[position] = tail_positions[index - 1] if index else None
+
+    kept = set()
+    position = tail_positions[-1] if tail_positions else None
+    while position is not None:
+        kept.add(position)
+        position = previous[position]
+
+    # other items follow the last kept item before them
+    targets = []
+    anchor_position, anchor_order = -1, -1
+    for position, order in enumerate(orders):
+        if position in kept:
+            anchor_position, anchor_order = position, order
+            targets.append(order)
+        else:
+            targets.append(anchor_order + position - anchor_position)
+    return targets
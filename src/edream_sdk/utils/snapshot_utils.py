@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import Optional, Iterator, List, Dict, Any
+from ..types.playlist_types import Playlist, PlaylistItem, PlaylistKeyframe
+
+DEFAULT_SNAPSHOT_STORE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "edream_sdk", "playlists.sqlite3"
+)
+SNAPSHOT_STORE_TIMEOUT = 30.0
+SNAPSHOT_PAGE_SIZE = 100
+
+
+def get_page_fingerprint(rows: List[Any]) -> str:
+    """
+    Returns a fingerprint of a page of rows, equal for pages with equal content
+    Args:
+        rows (List[Any]): page rows
+    Returns:
+        str: sha256 hex digest of the rows serialized as canonical json
+    """
+    data = json.dumps(rows, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class PlaylistSnapshotStore:
+    """
+    Local SQLite store of playlist snapshots: playlist fields, items and keyframes,
+    by playlist uuid. Items and keyframes are stored in pages with a fingerprint, so
+    a refresh only rewrites pages whose content changed. A refresh is written in one
+    transaction and a snapshot read in one, so with WAL readers of any thread or
+    process never see half of a refresh
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DEFAULT_SNAPSHOT_STORE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS playlists ("
+                "uuid TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at TEXT, "
+                "item_count INTEGER, checked_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "uuid TEXT NOT NULL, kind TEXT NOT NULL, page INTEGER NOT NULL, "
+                "fingerprint TEXT NOT NULL, rows TEXT NOT NULL, "
+                "PRIMARY KEY (uuid, kind, page))"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=SNAPSHOT_STORE_TIMEOUT)
+        try:
+            # commits on success, rolls back on error
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_version(self, uuid: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns what a stored playlist snapshot was taken at
+        Args:
+            uuid (str): playlist uuid
+        Returns:
+            Optional[Dict[str, Any]]: updated_at, itemCount and checkedAt, None if not stored
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT updated_at, item_count, checked_at FROM playlists WHERE uuid = ?",
+                (uuid,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"updated_at": row[0], "itemCount": row[1], "checkedAt": row[2]}
+
+    def get(self, uuid: str) -> Optional[Playlist]:
+        """
+        Reads a playlist snapshot, with its items and keyframes
+        Args:
+            uuid (str): playlist uuid
+        Returns:
+            Optional[Playlist]: playlist with items and playlistKeyframes, None if not stored
+        """
+        with self._connect() as connection:
+            # one read transaction, a refresh committed meanwhile isn't seen halfway
+            connection.execute("BEGIN")
+            row = connection.execute(
+                "SELECT data FROM playlists WHERE uuid = ?", (uuid,)
+            ).fetchone()
+            if row is None:
+                return None
+            pages = connection.execute(
+                "SELECT kind, rows FROM pages WHERE uuid = ? ORDER BY kind, page", (uuid,)
+            ).fetchall()
+        playlist: Playlist = json.loads(row[0])
+        playlist["items"] = []
+        playlist["playlistKeyframes"] = []
+        for kind, rows in pages:
+            playlist[kind].extend(json.loads(rows))
+        return playlist
+
+    def touch(self, uuid: str) -> None:
+        """
+        Records that a stored playlist was found unchanged
+        Args:
+            uuid (str): playlist uuid
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE playlists SET checked_at = ? WHERE uuid = ?", (time.time(), uuid)
+            )
+
+    def put(
+        self,
+        playlist: Playlist,
+        items: List[PlaylistItem],
+        keyframes: List[PlaylistKeyframe],
+        page_size: int = SNAPSHOT_PAGE_SIZE,
+    ) -> int:
+        """
+        Stores a playlist snapshot, rewriting only the pages that changed
+        Args:
+            playlist (Playlist): playlist fields, items and keyframes are ignored
+            items (List[PlaylistItem]): playlist items, in order
+            keyframes (List[PlaylistKeyframe]): playlist keyframes, in order
+            page_size (int): rows per stored page
+        Returns:
+            int: number of pages written or removed, 0 if nothing changed
+        """
+        uuid = playlist["uuid"]
+        data = {
+            key: value
+            for key, value in playlist.items()
+            if key not in ("items", "playlistKeyframes")
+        }
+        changes = 0
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO playlists (uuid, data, updated_at, item_count, checked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    uuid,
+                    json.dumps(data, default=str),
+                    playlist.get("updated_at"),
+                    playlist.get("itemCount"),
+                    time.time(),
+                ),
+            )
+            for kind, rows in (("items", items), ("playlistKeyframes", keyframes)):
+                stored = dict(
+                    connection.execute(
+                        "SELECT page, fingerprint FROM pages WHERE uuid = ? AND kind = ?",
+                        (uuid, kind),
+                    ).fetchall()
+                )
+                pages = [rows[start : start + page_size] for start in range(0, len(rows), page_size)]
+                for page, page_rows in enumerate(pages):
+                    fingerprint = get_page_fingerprint(page_rows)
+                    if stored.get(page) == fingerprint:
+                        continue
+                    connection.execute(
+                        "INSERT OR REPLACE INTO pages (uuid, kind, page, fingerprint, rows) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (uuid, kind, page, fingerprint, json.dumps(page_rows, default=str)),
+                    )
+                    changes += 1
+                removed = connection.execute(
+                    "DELETE FROM pages WHERE uuid = ? AND kind = ? AND page >= ?",
+                    (uuid, kind, len(pages)),
+                ).rowcount
+                changes += removed
+        return changes
+
+    def remove(self, uuid: str) -> None:
+        """
+        Removes a playlist snapshot
+        Args:
+            uuid (str): playlist uuid
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM pages WHERE uuid = ?", (uuid,))
+            connection.execute("DELETE FROM playlists WHERE uuid = ?", (uuid,))
@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import calendar
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qsl
+from typing import Optional, Dict, List, Set, Tuple, Callable, Iterable, Iterator, Union, BinaryIO
+from ..types.file_upload_types import UploadJournalState
+
+DEFAULT_UPLOAD_JOURNAL_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "edream_sdk", "uploads"
+)
+UPLOAD_JOURNAL_VERSION = 1
+# presigned urls expiring within this many seconds, or half their lifetime, are renewed before use
+URL_RENEWAL_MARGIN = 60
+# max part urls requested in a single refresh
+URL_REFRESH_BATCH_SIZE = 32
+
+
+class UploadJournal:
+    """
+    Append-only on-disk record of a multipart upload, used to resume it after a crash.
+    The first line holds the upload header (uploadId, uuid, part size and source file
+    stats), every following line a completed part. A torn last line is ignored
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_file(
+        cls,
+        file_path: str,
+        type: str,
+        uuid: Optional[str] = None,
+        frame_number: Optional[int] = None,
+        journal_dir: Optional[str] = None,
+    ) -> "UploadJournal":
+        """
+        Returns the journal of a file upload, keyed by file path and upload target
+        Args:
+            file_path (str): file path
+            type (str): file type
+            uuid (Optional[str]): target resource uuid, if any
+            frame_number (Optional[int]): filmstrip frame number, if any
+            journal_dir (Optional[str]): journals directory
+        Returns:
+            UploadJournal: upload journal
+        """
+        key = json.dumps(
+            [os.path.abspath(file_path), str(getattr(type, "value", type)), uuid, frame_number]
+        )
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jsonl"
+        return cls(os.path.join(journal_dir or DEFAULT_UPLOAD_JOURNAL_DIR, name))
+
+    def load(self, file_size: int, file_mtime_ns: int) -> Optional[UploadJournalState]:
+        """
+        Loads journal state, discarding it if the source file changed since it was written
+        Args:
+            file_size (int): current source file size
+            file_mtime_ns (int): current source file modification time
+        Returns:
+            Optional[UploadJournalState]: upload state, None if there is nothing to resume
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as journal:
+                lines = journal.read().splitlines()
+        except OSError:
+            return None
+
+        try:
+            state: UploadJournalState = json.loads(lines[0])
+        except (IndexError, ValueError):
+            self.discard()
+            return None
+
+        if (
+            state.get("version") != UPLOAD_JOURNAL_VERSION
+            or state.get("fileSize") != file_size
+            or state.get("fileMtimeNs") != file_mtime_ns
+        ):
+            self.discard()
+            return None
+
+        parts: Dict[int, str] = {}
+        for line in lines[1:]:
+            try:
+                part = json.loads(line)
+                parts[int(part["PartNumber"])] = part["ETag"]
+            except (ValueError, KeyError, TypeError):
+                # torn write of the last part, that part is uploaded again
+                continue
+        state["parts"] = parts
+        return state
+
+    def start(self, state: UploadJournalState) -> None:
+        """
+        Starts a new journal, replacing any previous one
+        Args:
+            state (UploadJournalState): upload header
+        """
+        header = {k: v for k, v in state.items() if k != "parts"}
+        header["version"] = UPLOAD_JOURNAL_VERSION
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(temp_path, "w", encoding="utf-8") as journal:
+                journal.write(json.dumps(header) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(temp_path, self.path)
+
+    def record_part(self, part_number: int, etag: str) -> None:
+        """
+        Appends a completed part to the journal
+        Args:
+            part_number (int): part number
+            etag (str): part etag
+        """
+        line = json.dumps({"PartNumber": part_number, "ETag": etag}) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as journal:
+                journal.write(line)
+                journal.flush()
+                os.fsync(journal.fileno())
+
+    def discard(self) -> None:
+        """
+        Removes the journal
+        """
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+
+def _read_into_parts(read_into, part_size: int) -> Iterator[bytearray]:
+    # reads straight into part buffers, without intermediate copies
+    while True:
+        part = bytearray(part_size)
+        with memoryview(part) as view:
+            filled = 0
+            while filled < part_size:
+                count = read_into(view[filled:])
+                if not count:
+                    break
+                filled += count
+        if filled < part_size:
+            del part[filled:]
+            yield part
+            return
+        yield part
+
+
+def _join_chunks(chunks: Iterable[bytes], part_size: int) -> Iterator[bytearray]:
+    part = bytearray()
+    for chunk in chunks:
+        view = memoryview(chunk).cast("B")
+        while len(view):
+            take = min(part_size - len(part), len(view))
+            part += view[:take]
+            view = view[take:]
+            if len(part) == part_size:
+                yield part
+                part = bytearray()
+    yield part
+
+
+def iter_stream_parts(
+    stream: Union[BinaryIO, Iterable[bytes]], part_size: int
+) -> Iterator[bytearray]:
+    """
+    Splits a file-like object or an iterable of byte chunks into parts of `part_size`
+    bytes. Only the part being filled is held in memory. The last part is shorter,
+    and is empty only if the whole stream is, so a stream always yields one part
+    Args:
+        stream (Union[BinaryIO, Iterable[bytes]]): readable binary stream or byte chunks
+        part_size (int): part size in bytes
+    Returns:
+        Iterator[bytearray]: stream parts
+    """
+    if hasattr(stream, "readinto"):
+        parts = _read_into_parts(stream.readinto, part_size)
+    elif hasattr(stream, "read"):
+        parts = _join_chunks(iter(lambda: stream.read(part_size), b""), part_size)
+    else:
+        parts = _join_chunks(stream, part_size)
+
+    previous = None
+    for part in parts:
+        # a trailing empty part is dropped, unless it is the only one
+        if previous is not None and part:
+            yield previous
+        if previous is None or part:
+            previous = part
+    yield previous
+
+
+def presigned_url_validity(url: str) -> Optional[Tuple[float, float]]:
+    """
+    Reads when a presigned url was signed and when it expires
+    (X-Amz-Date and X-Amz-Expires query parameters, or their X-Goog equivalents)
+    Args:
+        url (str): presigned url
+    Returns:
+        Optional[Tuple[float, float]]: signing time and expiry as unix timestamps,
+            None if the url doesn't tell
+    """
+    query = {k.lower(): v for k, v in parse_qsl(urlparse(url).query)}
+    for prefix in ("x-amz-", "x-goog-"):
+        date = query.get(prefix + "date")
+        expires = query.get(prefix + "expires")
+        if date and expires:
+            try:
+                signed_at = calendar.timegm(time.strptime(date, "%Y%m%dT%H%M%SZ"))
+                return signed_at, signed_at + int(expires)
+            except ValueError:
+                return None
+    return None
+
+
+class PresignedUrls:
+    """
+    Thread-safe presigned urls of a multipart upload's parts. A url missing, about
+    to expire or that failed is renewed before use, together with the following
+    parts that need it too, in a single refresh request
+    """
+
+    def __init__(
+        self,
+        urls: List[Optional[str]],
+        refresh: Callable[[int, int], List[str]],
+        total_parts: Optional[int] = None,
+        done: Optional[Iterable[int]] = None,
+        batch_size: int = URL_REFRESH_BATCH_SIZE,
+    ):
+        """
+        Args:
+            urls (List[Optional[str]]): known urls, by part number - 1, None if unknown
+            refresh (Callable[[int, int], List[str]]): requests urls for `count` parts
+                starting at a part number
+            total_parts (Optional[int]): number of parts, None if unknown
+            done (Optional[Iterable[int]]): parts already uploaded, which need no url
+            batch_size (int): max parts refreshed in one request
+        """
+        self.total_parts = total_parts
+        self.batch_size = max(batch_size, 1)
+        self._refresh = refresh
+        self._urls: Dict[int, str] = {
+            index + 1: url for index, url in enumerate(urls) if url
+        }
+        self._done: Set[int] = set(done or [])
+        self._lock = threading.Lock()
+
+    def _is_stale(self, part_number: int, now: float) -> bool:
+        url = self._urls.get(part_number)
+        if url is None:
+            return True
+        validity = presigned_url_validity(url)
+        if validity is None:
+            return False
+        signed_at, expiry = validity
+        return expiry - min(URL_RENEWAL_MARGIN, (expiry - signed_at) / 2) <= now
+
+    def get(self, part_number: int) -> str:
+        """
+        Returns a url of a part that is valid for at least URL_RENEWAL_MARGIN seconds
+        Args:
+            part_number (int): part number
+        Returns:
+            str: presigned url
+        """
+        with self._lock:
+            now = time.time()
+            if not self._is_stale(part_number, now):
+                return self._urls[part_number]
+
+            # renews the run of following parts that would need it soon as well
+            count = 1
+            while count < self.batch_size:
+                next_part = part_number + count
+                if self.total_parts is not None and next_part > self.total_parts:
+                    break
+                if next_part in self._done or not self._is_stale(next_part, now):
+                    break
+                count += 1
+
+            urls = self._refresh(part_number, count)
+            if not urls:
+                raise Exception(f"No presigned url returned for part {part_number}")
+            for index, url in enumerate(urls[:count]):
+                self._urls[part_number + index] = url
+            return self._urls[part_number]
+
+    def invalidate(self, part_number: int, url: str) -> None:
+        """
+        Marks the url of a part as unusable after a failed request, unless it was
+        already renewed meanwhile
+        Args:
+            part_number (int): part number
+            url (str): url that failed
+        """
+        with self._lock:
+            if self._urls.get(part_number) == url:
+                del self._urls[part_number]
+
+    def discard(self, part_number: int) -> None:
+        """
+        Forgets the url of an uploaded part
+        Args:
+            part_number (int): part number
+        """
+        with self._lock:
+            self._urls.pop(part_number, None)
+            self._done.add(part_number)
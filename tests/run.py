@@ -123,6 +123,27 @@ def run():
     #     item_uuid="d20cad5c-b294-4094-a19d-f5ab043980ae",
     # )
 
+    # results = edream_client.add_items_to_playlist(
+    #     "b9a643bd-f6d0-48ac-ba43-b10dcf4ecda4",
+    #     ["dream_uuid_1", "dream_uuid_2", (PlaylistItemType.PLAYLIST, "playlist_uuid")],
+    # )
+    # print(f"Added {sum(result['success'] for result in results)} of {len(results)} items")
+
+    # Rate limited replies are retried even when their body isn't json, such as the html
+    # 429 of a gateway: point a client at a proxy answering 429 with "Retry-After: 0" and
+    # a "<html>Too Many Requests</html>" body, the item is retried and added once it passes
+    # throttled_client = create_edream_client(backend_url="http://localhost:8081/api/v1", api_key=api_key)
+    # results = throttled_client.add_items_to_playlist("b9a643bd-f6d0-48ac-ba43-b10dcf4ecda4", ["dream_uuid_1"], jobs=1)
+    # print(results[0]["success"], results[0].get("error"))
+
+    # Make a playlist match a list of dreams, changing only what differs
+    # result = edream_client.sync_playlist("b9a643bd-f6d0-48ac-ba43-b10dcf4ecda4", ["dream_uuid_1", "dream_uuid_2"])
+    # print(f"Added {len(result['added'])}, removed {len(result['removed'])}, moved {result['moved']}")
+
+    # edream_client.remove_items_from_playlist(
+    #     "b9a643bd-f6d0-48ac-ba43-b10dcf4ecda4", [result["id"] for result in results if result["success"]]
+    # )
+
     # edream_client.delete_item_from_playlist(
     #     uuid="b9a643bd-f6d0-48ac-ba43-b10dcf4ecda4", playlist_item_id=324
     # )
@@ -132,6 +153,15 @@ def run():
     #     file_path="path_to_file/python_video.mp4",
     # )
 
+    # results = edream_client.add_files_to_playlist(
+    #     uuid="b9a643bd-f6d0-48ac-ba43-b10dcf4ecda4",
+    #     paths="path_to_directory",
+    #     options={"concurrency": 4},
+    #     jobs=4,
+    # )
+    # for result in results:
+    #     print(result["file_path"], result["success"], result.get("error"))
+
     # edream_client.add_keyframe_to_playlist(
     #     playlist,
     #     "keyframe from python",
@@ -168,6 +198,25 @@ def run():
     # print(f"Playlist keyframes: {playlist_keyframes_paginated['keyframes']}")
     # print(f"Paginated playlist keyframes (take=5, skip=0): {len(playlist_keyframes_paginated['keyframes'])} keyframes")
 
+    # for playlist_item in edream_client.iter_playlist_items("13489b20-cc0b-4923-8ea8-3f64015fe389"):
+    #     print(playlist_item["id"])
+
+    # tree = edream_client.resolve_playlist_tree("13489b20-cc0b-4923-8ea8-3f64015fe389", max_depth=4)
+    # print(f"{len(tree['playlists'])} playlists, {len(tree['dreams'])} dreams, cycles: {tree['cycles']}")
+
+    # Poll playlists through local snapshots, unchanged playlists cost one request each
+    # changed = edream_client.refresh_playlist_snapshots(["13489b20-cc0b-4923-8ea8-3f64015fe389"])
+    # playlist = edream_client.get_playlist_snapshot("13489b20-cc0b-4923-8ea8-3f64015fe389", max_age=60)
+
+    # Play a playlist, nested playlists included, with the next 3 videos downloaded ahead
+    # with edream_client.prefetch_playlist("13489b20-cc0b-4923-8ea8-3f64015fe389", ahead=3) as prefetcher:
+    #     for dream, video_path in prefetcher:
+    #         print(f"Playing {dream['uuid']} from {video_path}")
+
+    # Export a playlist's media, re-runs only download what is missing or changed
+    # result = edream_client.download_playlist("13489b20-cc0b-4923-8ea8-3f64015fe389", "exports/playlist", jobs=8)
+    # print(f"Downloaded {result['downloaded']}, up to date {result['skipped']}, failed {len(result['failed'])}")
+
     """
     File functions
     """
@@ -176,11 +225,74 @@ def run():
     #     type=DreamFileType.DREAM,
     # )
 
+    # Upload parts in parallel
+    # edream_client.upload_file(
+    #     file_path="path_to_file/dream.mp4",
+    #     type=DreamFileType.DREAM,
+    #     options={"concurrency": 4},
+    # )
+
+    # Adapt parts in parallel to the measured throughput
+    # result = edream_client.upload_file_with_result(
+    #     file_path="path_to_file/dream.mp4",
+    #     type=DreamFileType.DREAM,
+    #     options={"adaptive_concurrency": True, "max_concurrency": 16},
+    # )
+    # print(f"Finished with {result['concurrency']} parts at {result['throughput']} B/s")
+
+    # Upload an encoder output as it is produced, without a temp file
+    # encoder = subprocess.Popen(["ffmpeg", ..., "-f", "mp4", "pipe:1"], stdout=subprocess.PIPE)
+    # result = edream_client.upload_stream(
+    #     encoder.stdout,
+    #     file_name="render.mp4",
+    #     type=DreamFileType.DREAM,
+    #     options={"concurrency": 4, "md5": True},
+    # )
+
+    # Resumable upload, run again after an interruption to upload only missing parts
+    # edream_client.upload_file(
+    #     file_path="path_to_file/dream.mp4",
+    #     type=DreamFileType.DREAM,
+    #     options={"resumable": True},
+    # )
+
+    # Upload returning details, md5 is computed while uploading
+    # result = edream_client.upload_file_with_result(
+    #     file_path="path_to_file/dream.mp4",
+    #     type=DreamFileType.DREAM,
+    #     options={"md5": True, "content_md5": True},
+    # )
+    # print(f"Uploaded dream {result['uuid']} with md5 {result['md5']}")
+
     # edream_client.download_file(
     #     "file_url",
     #     "file_path",
     # )
 
+    # Local copy from the media cache, downloaded once on a miss
+    # dream = edream_client.get_dream("dream_uuid")
+    # local_path = edream_client.download_cached(dream["video"], md5=dream["md5"])
+
+    # Download byte ranges in parallel
+    # edream_client.download_file(
+    #     "file_url",
+    #     "file_path",
+    #     concurrency=8,
+    # )
+
+    # Download a dream video, checked against its md5 while it is written
+    # edream_client.download_file(dream["video"], "file_path", dream=dream)
+
+    # Stream a dream video into ffmpeg without writing it to disk
+    # with edream_client.open_download(dream["video"]) as video:
+    #     ffmpeg = subprocess.Popen(
+    #         ["ffmpeg", "-i", "pipe:0", "-vf", "scale=640:-2", "out.mp4"],
+    #         stdin=subprocess.PIPE,
+    #     )
+    #     shutil.copyfileobj(video, ffmpeg.stdin)
+    #     ffmpeg.stdin.close()
+    #     ffmpeg.wait()
+
     """
     Upload thumbnail
     """
@@ -233,6 +345,10 @@ def run():
     # print(f"Grouped feed count: {grouped_feed['count']}")
     # print(f"Grouped feed items: {len(grouped_feed['feedItems'])}")
     # print(f"Virtual playlists: {len(grouped_feed['virtualPlaylists'])}")
+
+    # Scan the whole feed page by page, stopping at any point
+    # for feed_item in edream_client.feed.iter_feed(feed_type="dream"):
+    #     print(feed_item["id"])
     pass
 
 